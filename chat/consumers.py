@@ -1,18 +1,23 @@
 import json
-from channels.generic.websocket import AsyncWebsocketConsumer
 from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.db import database_sync_to_async
 from django.utils.timesince import timesince
 
-from .serializers import UserSerializer
 from .models import Message, ChatRoom
-from django.contrib.auth import get_user_model
-
-User = get_user_model()
+from .writer import writer
+from users.presence import presence
 
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.room_id = self.scope['url_route']['kwargs']['room_id']
         self.room_group_name = f"chat_{self.room_id}"
+        # Resolved once per connection: every message reuses the sender and the checked room
+        self.user = self.scope["user"]
+        self.present = False
+        if self.user.is_anonymous or not await self.is_member():
+            await self.close()
+            return
         # Add the channel to the room's group
         await self.channel_layer.group_add(
             self.room_group_name,
@@ -20,6 +25,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
         # Accept the WebSocket connection
         await self.accept()
+        await sync_to_async(presence.connect)(self.user.id)
+        self.present = True
         # Send a connection message to the client
 
     async def disconnect(self, close_code):
@@ -28,24 +35,29 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.room_group_name,
             self.channel_name
         )
+        if self.present:
+            await sync_to_async(presence.disconnect)(self.user.id)
 
     async def receive(self, text_data):
         text_data_json = json.loads(text_data)
+        if text_data_json.get('type') == 'heartbeat':
+            await sync_to_async(presence.heartbeat)(self.user.id)
+            return
         message = text_data_json['message']
-        user = self.scope["user"]
-        user_serializer = UserSerializer(user)
-        email = user_serializer.data['email']
 
-        new_message = await self.create_message(self.room_id, message, email)
-        
+        # Stored in the background by chat.writer, in order, after it is on its way
+        new_message = Message(content=message, room_id=self.room_id, sender=self.user)
+        writer.add(new_message)
+
         # Send the received message to the room's group
         await self.channel_layer.group_send(
             self.room_group_name,
             {
                 'type': 'chat_message',
+                'uuid': str(new_message.uuid),
                 'message': message,
                 'room_id': self.room_id,
-                'sender_email': email,
+                'sender_email': self.user.email,
                 'created': timesince(new_message.timestamp),
             }
         )
@@ -59,16 +71,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
         # Send the chat message to the WebSocket
         await self.send(text_data=json.dumps({
             'type': 'chat_message',
+            'uuid': event.get('uuid'),
             'message': message,
             'room_id': room_id,
             'sender_email': email,
             'created': created,
         }))
 
-    @sync_to_async
-    def create_message(self, room_id, message, email):
-        user = User.objects.get(email=email)
-        room = ChatRoom.objects.get(id=room_id) 
-        message = Message.objects.create(content=message, room=room, sender=user)
-        message.save()
-        return message
+    @database_sync_to_async
+    def is_member(self):
+        return ChatRoom.objects.filter(pk=self.room_id, members=self.user).exists()
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import time
+
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.consumers import ChatConsumer
+from chat.models import ChatRoom
+from chat.writer import writer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ("Measure chat messages per second through one ChatConsumer worker, "
+            "in a throwaway room between two existing users.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=1000,
+                            help="Messages to send.")
+        parser.add_argument('--users', type=int, nargs=2, metavar=('SENDER', 'RECIPIENT'),
+                            help="User ids to chat between (default: the first two users).")
+
+    def handle(self, *args, **options):
+        if options['users']:
+            users = list(User.objects.filter(pk__in=options['users']))
+        else:
+            users = list(User.objects.order_by('id')[:2])
+        if len(users) != 2:
+            raise CommandError("Two users are needed.")
+
+        room = ChatRoom.objects.create()
+        room.members.set(users)
+        try:
+            elapsed = asyncio.run(self.run(room.id, users[0], options['messages']))
+        finally:
+            # Takes the benchmark's messages with it
+            room.delete()
+        rate = options['messages'] / elapsed
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['messages']} messages in {elapsed:.2f}s: {rate:.0f} messages/s."
+        ))
+
+    async def run(self, room_id, sender, total):
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f'/ws/chat/{room_id}/')
+        communicator.scope['user'] = sender
+        communicator.scope['url_route'] = {'kwargs': {'room_id': room_id}}
+        connected, _ = await communicator.connect()
+        if not connected:
+            raise CommandError("The consumer refused the connection.")
+        started = time.monotonic()
+        for number in range(total):
+            await communicator.send_to(text_data=json.dumps({'message': f'benchmark {number}'}))
+        # Every message comes back through the room group
+        for _ in range(total):
+            await communicator.receive_from(timeout=30)
+        # and counts once it is stored
+        await writer.close()
+        elapsed = time.monotonic() - started
+        await communicator.disconnect()
+        return elapsed
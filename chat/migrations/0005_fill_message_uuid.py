@@ -0,0 +1,27 @@
+# Generated by Django 4.2.3 on 2026-10-17 13:20
+
+from django.db import migrations
+import uuid
+
+
+def fill_uuids(apps, schema_editor):
+    Message = apps.get_model('chat', 'Message')
+    batch = []
+    for message in Message.objects.only('id').iterator():
+        message.uuid = uuid.uuid4()
+        batch.append(message)
+        if len(batch) == 1000:
+            Message.objects.bulk_update(batch, ['uuid'])
+            batch = []
+    Message.objects.bulk_update(batch, ['uuid'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_message_uuid'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_uuids, migrations.RunPython.noop),
+    ]
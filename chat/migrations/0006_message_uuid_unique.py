@@ -0,0 +1,19 @@
+# Generated by Django 4.2.3 on 2026-10-17 13:20
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_fill_message_uuid'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='message',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
@@ -2,8 +2,10 @@ from rest_framework.views import APIView
 from rest_framework import permissions, status, generics
 from rest_framework.response import Response
 
-from django.db.models import Q
+from django.db.models import Q, Max, Count
 from django.contrib.auth import get_user_model
+from post.conditional import conditional
+from post.serializers import SeenSerializer
 
 from.models import ChatRoom, Message
 from .serializers import ChatRoomSerializer, MessageSerializer, ChatRoomListSerializer
@@ -11,6 +13,14 @@ from .serializers import ChatRoomSerializer, MessageSerializer, ChatRoomListSeri
 
 User = get_user_model()
 
+def room_validators(request, pk):
+    history = Message.objects.filter(room_id=pk).aggregate(
+        last_id=Max('id'), last_timestamp=Max('timestamp'),
+        total=Count('id'), unseen=Count('id', filter=Q(is_seen=False)),
+    )
+    return tuple(history.values())
+
+
 class CreateChatRoom(APIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ChatRoomSerializer
@@ -38,6 +48,7 @@ class RoomMessagesView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = MessageSerializer
  
+    @conditional(room_validators)
     def get(self, request, pk):
         try:
             room = ChatRoom.objects.get(pk=pk)
@@ -66,6 +77,19 @@ class MesageSeenView(APIView):
             return Response({'error': 'Chat room not found.'}, status=status.HTTP_404_NOT_FOUND)
         
 
+class RoomMessagesSeenView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        if not ChatRoom.objects.filter(pk=pk, members=request.user).exists():
+            return Response({'error': 'Chat room not found.'}, status=status.HTTP_404_NOT_FOUND)
+        serializer = SeenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        seen = Message.objects.filter(serializer.selection('timestamp'), room_id=pk, is_seen=False).exclude(
+            sender=request.user).update(is_seen=True)
+        return Response({'seen': seen}, status=status.HTTP_200_OK)
+
+
 class ChatRoomListView(generics.ListAPIView):
     serializer_class = ChatRoomListSerializer
 
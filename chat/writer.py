@@ -0,0 +1,120 @@
+import asyncio
+import atexit
+import logging
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from .models import Message
+
+# Messages stored per INSERT, and how long the first of a batch may wait for company.
+BATCH_SIZE = getattr(settings, 'CHAT_WRITE_BATCH_SIZE', 200)
+FLUSH_INTERVAL = getattr(settings, 'CHAT_WRITE_INTERVAL', 0.05)
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriter:
+    """
+    Write-behind store for chat messages, shared by every ChatConsumer of
+    the process.
+
+    A consumer builds the Message (its uuid and timestamp come from the
+    field defaults), hands it to `add` and broadcasts it at once. One task
+    drains the queue in arrival order and stores each batch with a single
+    bulk_create once BATCH_SIZE messages are waiting or FLUSH_INTERVAL has
+    passed, so messages of a room are stored in the order they were sent.
+    Until then the REST history does not show them.
+
+    `close()` stores whatever is left; the ASGI lifespan shutdown calls it,
+    with an atexit fallback for servers that do not speak lifespan.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.queue = None
+        self.task = None
+        self.full = None
+        atexit.register(self.drain)
+
+    def add(self, message):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop or self.task.done():
+            # First message, after close() or on a new event loop (tests): carry over what is still queued
+            queue = asyncio.Queue()
+            while self.queue is not None and not self.queue.empty():
+                left = self.queue.get_nowait()
+                if left is not None:
+                    queue.put_nowait(left)
+            self.loop, self.queue, self.full = loop, queue, asyncio.Event()
+            self.task = loop.create_task(self.run())
+        self.queue.put_nowait(message)
+        if self.queue.qsize() >= BATCH_SIZE:
+            self.full.set()
+
+    async def run(self):
+        while True:
+            first = await self.queue.get()
+            if first is None:
+                return
+            if self.queue.qsize() + 1 < BATCH_SIZE:
+                try:
+                    await asyncio.wait_for(self.full.wait(), FLUSH_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+            self.full.clear()
+            batch, closing = [first], False
+            while len(batch) < BATCH_SIZE and not self.queue.empty():
+                message = self.queue.get_nowait()
+                if message is None:
+                    closing = True
+                    break
+                batch.append(message)
+            await database_sync_to_async(self.write)(batch)
+            if closing:
+                return
+
+    def write(self, batch):
+        try:
+            Message.objects.bulk_create(batch)
+        except Exception:
+            # One bad row (say, its room was deleted) must not sink the batch
+            logger.exception("Storing %d chat messages failed, storing them one by one", len(batch))
+            for message in batch:
+                try:
+                    message.save(force_insert=True)
+                except Exception:
+                    logger.exception("Dropping chat message %s", message.uuid)
+
+    async def close(self):
+        if self.task is not None and not self.task.done():
+            self.queue.put_nowait(None)
+            await self.task
+        self.loop = self.task = None
+
+    def drain(self):
+        # Synchronous last resort: whatever is still queued once the loop is gone
+        if self.queue is None:
+            return
+        batch = []
+        while not self.queue.empty():
+            message = self.queue.get_nowait()
+            if message is not None:
+                batch.append(message)
+        if batch:
+            self.write(batch)
+
+
+writer = MessageWriter()
+
+
+async def lifespan(scope, receive, send):
+    """ASGI lifespan application that stores pending chat messages on shutdown."""
+    while True:
+        event = await receive()
+        if event['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif event['type'] == 'lifespan.shutdown':
+            await writer.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
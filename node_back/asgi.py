@@ -18,6 +18,7 @@ from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.security.websocket import AllowedHostsOriginValidator
 from django.core.asgi import get_asgi_application
 from chat import routing
+from chat.writer import lifespan
 from post.routing import websocket_urlpatterns
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'node_back.settings')
@@ -29,6 +30,7 @@ application = ProtocolTypeRouter(
         'http': django_asgi_application,
         'websocket': JwtAuthMiddleware(
             AllowedHostsOriginValidator(URLRouter(routing.websocket_urlpatterns + websocket_urlpatterns))
-        )
+        ),
+        'lifespan': lifespan,
     }
 )
@@ -147,6 +147,29 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Caching
+# Local LRU memory cache by default; set REDIS_CACHE_URL to share the cache
+# (and its invalidations) between processes.
+
+if os.environ.get('REDIS_CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_CACHE_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'nodenext',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Seconds a rendered home feed page is reused for
+FEED_CACHE_TIMEOUT = int(os.environ.get('FEED_CACHE_TIMEOUT', 60))
+
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels_redis.core.RedisChannelLayer',
@@ -175,6 +198,41 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 AUTH_USER_MODEL = 'users.User'
 
+# Number of ranked posts kept per user in the precomputed home feed
+FEED_SIZE = int(os.environ.get('FEED_SIZE', 500))
+# Feed ranking: tag overlap x engagement x time decay (see post/ranking.py)
+FEED_HALF_LIFE_HOURS = float(os.environ.get('FEED_HALF_LIFE_HOURS', 48))
+FEED_ENGAGEMENT_WEIGHT = float(os.environ.get('FEED_ENGAGEMENT_WEIGHT', 0.5))
+RANKING_INDEX_TTL = int(os.environ.get('RANKING_INDEX_TTL', 300))
+# Seconds the tag catalog's usage counts may lag behind newly tagged posts
+TAG_CATALOG_TTL = int(os.environ.get('TAG_CATALOG_TTL', 300))
+# Seconds before the tag search index is rebuilt even if no 'tags' version bump arrived
+TAG_INDEX_TTL = int(os.environ.get('TAG_INDEX_TTL', 300))
+# Likes are buffered in process and written in batches this often (seconds);
+# 0 writes every like through (see post/likes.py)
+LIKE_FLUSH_INTERVAL = float(os.environ.get('LIKE_FLUSH_INTERVAL', 1.0))
+LIKE_BUFFER_SIZE = int(os.environ.get('LIKE_BUFFER_SIZE', 5000))
+# Followers notified per batch when a post is created (see post/fanout.py)
+FANOUT_CHUNK_SIZE = int(os.environ.get('FANOUT_CHUNK_SIZE', 1000))
+# Seconds without progress after which another process resumes a fan-out
+FANOUT_STALE_AFTER = int(os.environ.get('FANOUT_STALE_AFTER', 300))
+# Likes, follows and comments on the same target within this many seconds
+# share one notification, re-pushed at most every DEBOUNCE seconds (see post/notifications.py)
+NOTIFICATION_COALESCE_WINDOW = int(os.environ.get('NOTIFICATION_COALESCE_WINDOW', 3600))
+NOTIFICATION_PUSH_DEBOUNCE = int(os.environ.get('NOTIFICATION_PUSH_DEBOUNCE', 10))
+# Seen notifications older than this are removed by `manage.py prune_notifications`
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 30))
+# Encoding of notification WebSocket frames: 'json' (text) or 'msgpack' (binary)
+NOTIFICATION_WIRE_FORMAT = os.environ.get('NOTIFICATION_WIRE_FORMAT', 'json')
+# Chat messages are stored in batches of up to CHAT_WRITE_BATCH_SIZE, at most
+# CHAT_WRITE_INTERVAL seconds after they were sent (see chat/writer.py)
+CHAT_WRITE_BATCH_SIZE = int(os.environ.get('CHAT_WRITE_BATCH_SIZE', 200))
+CHAT_WRITE_INTERVAL = float(os.environ.get('CHAT_WRITE_INTERVAL', 0.05))
+# A user is offline PRESENCE_TIMEOUT seconds after their last heartbeat; changes
+# reach User.is_online every PRESENCE_FLUSH_INTERVAL seconds (see users/presence.py)
+PRESENCE_TIMEOUT = int(os.environ.get('PRESENCE_TIMEOUT', 90))
+PRESENCE_FLUSH_INTERVAL = float(os.environ.get('PRESENCE_FLUSH_INTERVAL', 5.0))
+
 # SMTP Configuration
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
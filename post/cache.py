@@ -0,0 +1,53 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+FEED_CACHE_TIMEOUT = getattr(settings, 'FEED_CACHE_TIMEOUT', 60)
+
+# Cached responses are never deleted one by one. Keys embed version counters
+# and invalidating means bumping a counter, which orphans every key built
+# from the old value until it expires.
+
+
+def get_version(name):
+    key = f'version:{name}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_version(name):
+    key = f'version:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=None)
+
+
+def feed_cache_key(user_id, full_path):
+    digest = hashlib.md5(full_path.encode()).hexdigest()
+    return 'feed:{}:{}:{}:{}'.format(
+        get_version('feed'), get_version(f'feed:{user_id}'), user_id, digest
+    )
+
+
+def get_feed(key):
+    return cache.get(key)
+
+
+def set_feed(key, data):
+    cache.set(key, data, FEED_CACHE_TIMEOUT)
+
+
+def invalidate_feeds():
+    # Something every feed may show changed (a post, its visibility or comments).
+    # Like and report counts are not worth it: only the acting user's feed is
+    # invalidated and the rest catch up within FEED_CACHE_TIMEOUT.
+    bump_version('feed')
+
+
+def invalidate_user_feed(user_id):
+    bump_version(f'feed:{user_id}')
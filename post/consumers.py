@@ -1,6 +1,9 @@
 import json
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from users.presence import presence
+
 class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.user = self.scope["user"]
@@ -14,26 +17,45 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
             await self.accept()
+            await sync_to_async(presence.connect)(self.user.id)
             await self.send(text_data=json.dumps({
                 'message': 'connected'
             }))
 
     async def disconnect(self, close_code):
+        if self.user.is_anonymous:
+            return
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
+        await sync_to_async(presence.disconnect)(self.user.id)
 
     async def receive(self, text_data):
+        # Anything the client sends doubles as a presence heartbeat
+        await sync_to_async(presence.heartbeat)(self.user.id)
         await self.send(text_data=json.dumps({'status': 'OK'}))
 
     async def send_notification(self, event):
-        data = json.loads(event.get('value'))
-        await self.send(text_data=json.dumps({
-                'type' : 'notification',
-                'payload': data
-            }))
-        
+        frame = event.get('frame')
+        if frame is None:
+            # Sent by a producer that predates pre-encoded frames
+            await self.send(text_data=json.dumps({
+                    'type' : 'notification',
+                    'payload': json.loads(event.get('value')),
+                    'unread': event.get('unread'),
+                }))
+        else:
+            await self.send_frame(event)
+
+    async def send_frame(self, event):
+        # Pre-encoded by the producer: bytes go out as a binary frame, str as text
+        frame = event['frame']
+        if isinstance(frame, bytes):
+            await self.send(bytes_data=frame)
+        else:
+            await self.send(text_data=frame)
+
     async def logout_user(self, event):
         await self.send(text_data=json.dumps({
             'type': 'logout'
@@ -0,0 +1,45 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import User
+from .models import Post, Comment, Follow, Notification
+
+
+def count_of(queryset, field):
+    # Correlated COUNT(*) of `queryset` rows whose `field` points at the outer row
+    counts = (
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+# (model, counter column, rows counted for each object)
+COUNTERS = [
+    (Post, 'likes_count', lambda: count_of(Post.likes.through.objects.all(), 'post')),
+    (Post, 'reports_count', lambda: count_of(Post.reported_by_users.through.objects.all(), 'post')),
+    (Post, 'comments_count', lambda: count_of(Comment.objects.all(), 'post')),
+    (User, 'follower_count', lambda: count_of(Follow.objects.all(), 'following')),
+    (User, 'following_count', lambda: count_of(Follow.objects.all(), 'follower')),
+    (User, 'posts_count', lambda: count_of(Post.objects.filter(is_deleted=False), 'author')),
+    (User, 'reported_posts_count', lambda: count_of(Post.reported_by_users.through.objects.all(), 'user')),
+    (User, 'unread_notifications', lambda: count_of(Notification.objects.filter(is_seen=False), 'to_user')),
+]
+
+
+def repair_counters(dry_run=False):
+    """Recompute every counter column and fix the rows that drifted.
+
+    Returns a list of (model name, column, rows out of sync).
+    """
+    report = []
+    for model, column, actual in COUNTERS:
+        drifted = model.objects.annotate(actual=actual()).exclude(**{column: F('actual')})
+        total = drifted.count()
+        if total and not dry_run:
+            model.objects.filter(pk__in=drifted.values('pk')).update(**{column: actual()})
+        report.append((model.__name__, column, total))
+    return report
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from users.models import User
+from .models import FanOut, Follow, Notification
+from . import notifications
+from .worker import defer, worker
+
+# Followers notified per batch: one bulk insert and one burst of pushes.
+CHUNK_SIZE = getattr(settings, 'FANOUT_CHUNK_SIZE', 1000)
+# A claimed fan-out without progress for this many seconds lost its process and is taken over.
+STALE_AFTER = getattr(settings, 'FANOUT_STALE_AFTER', 300)
+
+# Every fan-out is a FanOut row created with its post. Each chunk of
+# notifications commits together with the id of the last follow it covered,
+# so a fan-out cut short by a restart resumes where it stopped and no
+# follower is notified twice. The row is deleted once every follower is done.
+
+
+def claimable():
+    return FanOut.objects.filter(
+        Q(claimed_at=None) | Q(claimed_at__lt=timezone.now() - timedelta(seconds=STALE_AFTER))
+    )
+
+
+def run_fan_out(fanout_id):
+    """Send a 'post' notification to every follower of the author, CHUNK_SIZE at a time."""
+    if not claimable().filter(pk=fanout_id).update(claimed_at=timezone.now()):
+        # Done, or another process has it
+        return
+    job = FanOut.objects.select_related('post').get(pk=fanout_id)
+    author = User.objects.get(pk=job.post.author_id)
+    follows = Follow.objects.filter(following_id=author.id).order_by('id')
+    last_id = job.last_follow_id
+    while True:
+        # Keyset on the follow id, so a chunk never rescans the ones before it
+        chunk = list(follows.filter(id__gt=last_id).values_list('id', 'follower_id')[:CHUNK_SIZE])
+        if not chunk:
+            FanOut.objects.filter(pk=fanout_id).delete()
+            return
+        last_id = chunk[-1][0]
+        with transaction.atomic():
+            notifications.bulk_notify([
+                Notification(
+                    from_user=author,
+                    to_user_id=follower_id,
+                    post_id=job.post_id,
+                    notification_type=Notification.NOTIFICATION_TYPES[1][0],
+                )
+                for _, follower_id in chunk
+            ])
+            progressed = FanOut.objects.filter(pk=fanout_id).update(
+                last_follow_id=last_id, claimed_at=timezone.now())
+            if not progressed:
+                # The post was deleted meanwhile
+                transaction.set_rollback(True)
+                return
+
+
+@worker.on_idle
+def resume_fan_outs():
+    for fanout_id in claimable().order_by('id').values_list('id', flat=True):
+        run_fan_out(fanout_id)
+
+
+def fan_out(post):
+    # Recorded with the post; the worker starts on it once both are committed
+    job = FanOut.objects.create(post=post)
+    defer(run_fan_out, job.id)
@@ -0,0 +1,147 @@
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Post, FeedEntry
+from .ranking import engagement_score, index
+from .worker import worker
+from . import cache
+
+# Each user keeps at most FEED_SIZE ranked entries, scored by post.ranking.
+# Only posts sharing at least one tag with the user's interests are stored;
+# everything else is served from the recency tail (see recent_posts).
+# A post reaches every interested user's feed, so saving one schedules the
+# refresh on the background worker instead of doing it in the request; so do
+# likes and comments, which rescore the post's entries.
+FEED_SIZE = getattr(settings, 'FEED_SIZE', 500)
+
+# {task: post ids} waiting for the worker
+pending = {}
+pending_lock = threading.Lock()
+
+
+def is_visible(post):
+    return not post.is_deleted and not post.is_blocked
+
+
+def ranked_posts(user):
+    # Ordering is annotated so keyset pagination can read it back off each post
+    return Post.objects.filter(
+        feed_entries__user=user, is_deleted=False, is_blocked=False
+    ).annotate(
+        score=F('feed_entries__score'), ranked_at=F('feed_entries__created_at')
+    ).order_by('-score', '-ranked_at', '-id')
+
+
+def recent_posts(user):
+    return Post.objects.filter(is_deleted=False, is_blocked=False).exclude(
+        feed_entries__user=user
+    ).order_by('-created_at', '-id')
+
+
+def rebuild_user_feed(user_id):
+    index.update_user(user_id)
+    entries = [
+        FeedEntry(user_id=user_id, post_id=post_id, score=score, created_at=created_at, engagement=engagement)
+        for score, created_at, post_id, engagement in index.rank_posts(user_id, FEED_SIZE)
+    ]
+    with transaction.atomic():
+        FeedEntry.objects.filter(user_id=user_id).delete()
+        FeedEntry.objects.bulk_create(entries)
+
+
+def schedule_refresh(post_ids):
+    """Refresh the feed entries of these posts on the worker once the transaction commits."""
+    schedule(refresh_pending, post_ids)
+
+
+def schedule_rescore(post_ids):
+    """Rescore these posts' entries for their current likes and comments, on the worker."""
+    schedule(rescore_posts, post_ids)
+
+
+def schedule(task, post_ids):
+    transaction.on_commit(lambda: enqueue(task, post_ids))
+
+
+def enqueue(task, post_ids):
+    # Requests in quick succession (post, then its tags; a burst of likes) share one run
+    with pending_lock:
+        idle = task not in pending
+        pending.setdefault(task, set()).update(post_ids)
+    if idle:
+        worker.submit(run_pending, task)
+
+
+def run_pending(task):
+    with pending_lock:
+        post_ids = pending.pop(task, set())
+    task(post_ids)
+
+
+def refresh_pending(post_ids):
+    # Deleted posts are gone from the query; post_delete already removed their entries
+    refresh_posts(list(Post.objects.filter(pk__in=post_ids)))
+    cache.invalidate_feeds()
+
+
+def rescore_posts(post_ids):
+    """
+    Move stored scores to the posts' current engagement. Only the engagement
+    term of rank_score depends on it, so every entry shifts by the same
+    difference and one UPDATE per post and stored engagement does it.
+    Cached feeds are left to expire, as for the counts themselves.
+    """
+    engagement = dict(
+        Post.objects.filter(pk__in=post_ids).values_list('id', F('likes_count') + F('comments_count'))
+    )
+    index.update_engagement(engagement)
+    stored = (
+        FeedEntry.objects.filter(post_id__in=engagement)
+        .exclude(engagement=F('post__likes_count') + F('post__comments_count'))
+        .values_list('post_id', 'engagement').distinct()
+    )
+    for post_id, old in stored:
+        new = engagement[post_id]
+        FeedEntry.objects.filter(post_id=post_id, engagement=old).update(
+            score=F('score') + (engagement_score(new) - engagement_score(old)), engagement=new,
+        )
+
+
+def refresh_posts(posts):
+    hidden = [post.id for post in posts if not is_visible(post)]
+    if hidden:
+        remove_posts(hidden)
+    posts = [post for post in posts if is_visible(post)]
+    if not posts:
+        return
+
+    entries = []
+    for post in posts:
+        index.update_post(post)
+        entries.extend(
+            FeedEntry(user_id=user_id, post_id=post.id, score=score, created_at=post.created_at,
+                      engagement=post.likes_count + post.comments_count)
+            for user_id, score in index.rank_users(post.id).items()
+        )
+    with transaction.atomic():
+        FeedEntry.objects.filter(post_id__in=[post.id for post in posts]).delete()
+        FeedEntry.objects.bulk_create(entries)
+    trim_feeds({entry.user_id for entry in entries})
+
+
+def remove_posts(post_ids):
+    index.remove_posts(post_ids)
+    FeedEntry.objects.filter(post_id__in=post_ids).delete()
+
+
+def trim_feeds(user_ids):
+    # Every entry past FEED_SIZE in its user's ranking, removed with one DELETE
+    overflow = FeedEntry.objects.filter(user_id__in=user_ids).annotate(position=Window(
+        RowNumber(), partition_by=F('user_id'),
+        order_by=[F('score').desc(), F('created_at').desc(), F('post_id').desc()],
+    )).filter(position__gt=FEED_SIZE)
+    FeedEntry.objects.filter(id__in=overflow.values('id')).delete()
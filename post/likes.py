@@ -0,0 +1,208 @@
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from .models import Post, Notification
+from . import cache, feed, notifications
+
+# Seconds between flushes of buffered likes; 0 writes every change through.
+FLUSH_INTERVAL = getattr(settings, 'LIKE_FLUSH_INTERVAL', 1.0)
+# Buffered changes that trigger a flush before the interval is up.
+MAX_PENDING = getattr(settings, 'LIKE_BUFFER_SIZE', 5000)
+
+Like = Post.likes.through
+
+logger = logging.getLogger(__name__)
+
+
+class LikeFlusher(threading.Thread):
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        threading.Thread.__init__(self, daemon=True)
+
+    def run(self):
+        while True:
+            self.buffer.wake.wait(FLUSH_INTERVAL)
+            self.buffer.wake.clear()
+            try:
+                self.buffer.flush()
+            except Exception:
+                logger.exception("Flushing buffered likes failed")
+            finally:
+                close_old_connections()
+
+
+class LikeBuffer:
+    """
+    Write-behind buffer of likes.
+
+    Each (post, user) pair holds the state the user asked for last and the
+    state stored when it was first buffered, so liking and unliking back
+    and forth between flushes cancels out without touching the database. A
+    flush writes the net changes per post with one bulk insert, one delete
+    and one counter update. Until then, reads add `delta(post_id)` to the
+    stored counter and `liked(post_id)` to the stored likers.
+
+    The buffer lives in the process that took the request: other workers
+    see a like once it is flushed, at most FLUSH_INTERVAL seconds later.
+    Requests therefore carry the state the user wants rather than a toggle:
+    workers that each read the pair as unliked cannot turn one request into
+    a like and the next into a second like the user never asked for, and a
+    repeated request changes nothing.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.pending = {}
+        self.flushing = {}
+        self.deltas = defaultdict(int)
+        self.flushing_deltas = {}
+        self.flusher = None
+
+    def state(self, key):
+        # Buffered state, or None when only the database knows
+        for buffered in (self.pending, self.flushing):
+            if key in buffered:
+                return buffered[key][0]
+        return None
+
+    def is_liked(self, post_id, user_id):
+        with self.lock:
+            liked = self.state((post_id, user_id))
+        if liked is None:
+            liked = Like.objects.filter(post_id=post_id, user_id=user_id).exists()
+        return liked
+
+    def set_liked(self, post_id, user_id, liked):
+        """Make the user's like on the post `liked`; repeating a state changes nothing."""
+        key = (post_id, user_id)
+        with self.lock:
+            buffered = self.state(key) is not None
+        stored = None if buffered else Like.objects.filter(post_id=post_id, user_id=user_id).exists()
+        with self.lock:
+            if key in self.pending:
+                current, stored = self.pending[key]
+            elif key in self.flushing:
+                current = stored = self.flushing[key][0]
+            else:
+                if stored is None:
+                    # Flushed since we looked
+                    stored = Like.objects.filter(post_id=post_id, user_id=user_id).exists()
+                current = stored
+            if liked == current:
+                return
+            if liked == stored:
+                self.pending.pop(key, None)
+            else:
+                self.pending[key] = (liked, stored)
+            self.deltas[post_id] += 1 if liked else -1
+            if not self.deltas[post_id]:
+                del self.deltas[post_id]
+            full = len(self.pending) >= MAX_PENDING
+
+        if not FLUSH_INTERVAL:
+            self.flush()
+        else:
+            self.start()
+            if full:
+                self.wake.set()
+
+    def delta(self, post_id):
+        with self.lock:
+            return self.deltas.get(post_id, 0) + self.flushing_deltas.get(post_id, 0)
+
+    def merge_liked(self, user_id, post_ids, stored):
+        """`stored` (post ids the user likes in the database) with unflushed changes applied."""
+        liked = set(stored)
+        with self.lock:
+            for post_id in post_ids:
+                state = self.state((post_id, user_id))
+                if state is True:
+                    liked.add(post_id)
+                elif state is False:
+                    liked.discard(post_id)
+        return liked
+
+    def liked(self, post_id):
+        """{user id: buffered state} for the post's unflushed changes."""
+        with self.lock:
+            return {
+                user_id: liked
+                for buffered in (self.flushing, self.pending)
+                for (buffered_post, user_id), (liked, _) in buffered.items() if buffered_post == post_id
+            }
+
+    def start(self):
+        if self.flusher is None:
+            with self.lock:
+                if self.flusher is None:
+                    self.flusher = LikeFlusher(self)
+                    self.flusher.start()
+                    atexit.register(self.flush)
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                if not self.pending:
+                    return
+                self.flushing, self.pending = self.pending, {}
+                self.flushing_deltas, self.deltas = dict(self.deltas), defaultdict(int)
+            try:
+                self.write(self.flushing)
+            except Exception:
+                # Put the batch back under anything changed since, for the next flush
+                with self.lock:
+                    for key, change in self.flushing.items():
+                        if key not in self.pending:
+                            self.pending[key] = change
+                            self.deltas[key[0]] += 1 if change[0] else -1
+                raise
+            finally:
+                with self.lock:
+                    self.flushing, self.flushing_deltas = {}, {}
+
+    def write(self, changes):
+        by_post = defaultdict(dict)
+        for (post_id, user_id), (liked, _) in changes.items():
+            by_post[post_id][user_id] = liked
+
+        added, counted = [], []
+        with transaction.atomic():
+            authors = dict(Post.objects.filter(pk__in=by_post).values_list('id', 'author_id'))
+            for post_id, users in by_post.items():
+                if post_id not in authors:
+                    continue
+                # Stored state is authoritative: another worker may have flushed these pairs
+                stored = set(Like.objects.filter(post_id=post_id, user_id__in=users).values_list('user_id', flat=True))
+                add = [user_id for user_id, liked in users.items() if liked and user_id not in stored]
+                remove = [user_id for user_id, liked in users.items() if not liked and user_id in stored]
+                Like.objects.bulk_create([Like(post_id=post_id, user_id=user_id) for user_id in add])
+                if remove:
+                    Like.objects.filter(post_id=post_id, user_id__in=remove).delete()
+                if len(add) != len(remove):
+                    Post.objects.filter(pk=post_id).update(likes_count=F('likes_count') + len(add) - len(remove))
+                    counted.append(post_id)
+                added.extend((post_id, user_id) for user_id in add if user_id != authors[post_id])
+            if counted:
+                feed.schedule_rescore(counted)
+
+        # One coalesced notification per post, whoever liked it in this batch
+        likers = defaultdict(list)
+        for post_id, user_id in added:
+            likers[post_id].append(user_id)
+        for post_id, user_ids in likers.items():
+            notifications.notify(user_ids, authors[post_id], Notification.NOTIFICATION_TYPES[0][0], post_id=post_id)
+        # Feeds cached by other processes did not see these changes in their buffer
+        for user_id in {user_id for _, user_id in changes}:
+            cache.invalidate_user_feed(user_id)
+
+
+buffer = LikeBuffer()
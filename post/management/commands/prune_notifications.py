@@ -0,0 +1,52 @@
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from post import notifications
+
+
+class Command(BaseCommand):
+    help = "Delete (optionally archiving) seen notifications older than the retention period, in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 30),
+                            help="Keep seen notifications updated within this many days.")
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help="Rows deleted per transaction.")
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help="Seconds to sleep between chunks to leave room for other writers.")
+        parser.add_argument('--archive', metavar='PATH',
+                            help="Append the deleted rows to this file as JSON lines first.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        archive = None
+        if options['archive']:
+            archive_file = open(options['archive'], 'a')
+
+            def archive(rows):
+                # Written before the delete commits: a failed chunk may be archived twice, never lost
+                archive_file.writelines(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows)
+                archive_file.flush()
+
+        started = time.monotonic()
+        total = 0
+        try:
+            for deleted in notifications.prune_seen(cutoff, options['chunk_size'], archive):
+                total += deleted
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"Deleted {total} notifications so far...")
+                if options['pause']:
+                    time.sleep(options['pause'])
+        finally:
+            if archive is not None:
+                archive_file.close()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {total} seen notifications older than {options['days']} days in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from post import feed
+from post.ranking import index
+from post.models import Interest
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed home feed for every user with interests."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help="Only rebuild the feed of this user id (repeatable).")
+
+    def handle(self, *args, **options):
+        user_ids = Interest.objects.values_list('user_id', flat=True)
+        if options['user_ids']:
+            user_ids = user_ids.filter(user_id__in=options['user_ids'])
+
+        # Start from a fresh index so every feed is scored against current data
+        index.build()
+        total = 0
+        for user_id in user_ids.iterator():
+            feed.rebuild_user_feed(user_id)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} feeds."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from post.counters import repair_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized like/report/comment/follow/post/unread counters and repair drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many rows are out of sync.")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        for model, column, total in repair_counters(dry_run=dry_run):
+            action = "out of sync" if dry_run else "repaired"
+            self.stdout.write(f"{model}.{column}: {total} {action}")
+        self.stdout.write(self.style.SUCCESS("Done."))
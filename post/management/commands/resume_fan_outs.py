@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from post.fanout import claimable, resume_fan_outs
+
+
+class Command(BaseCommand):
+    help = "Finish new-post notifications whose fan-out was interrupted (e.g. by a restart)."
+
+    def handle(self, *args, **options):
+        pending = claimable().count()
+        resume_fan_outs()
+        self.stdout.write(self.style.SUCCESS(f"Resumed {pending} fan-outs."))
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.3 on 2026-10-17 12:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(queryset, field):
+    counts = (
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('post', 'Post')
+    Comment = apps.get_model('post', 'Comment')
+    Follow = apps.get_model('post', 'Follow')
+    User = apps.get_model('users', 'User')
+    Post.objects.update(
+        likes_count=count_of(Post.likes.through.objects.all(), 'post'),
+        reports_count=count_of(Post.reported_by_users.through.objects.all(), 'post'),
+        comments_count=count_of(Comment.objects.all(), 'post'),
+    )
+    User.objects.update(
+        follower_count=count_of(Follow.objects.all(), 'following'),
+        following_count=count_of(Follow.objects.all(), 'follower'),
+        posts_count=count_of(Post.objects.filter(is_deleted=False), 'author'),
+        reported_posts_count=count_of(Post.reported_by_users.through.objects.all(), 'user'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_counters'),
+        ('post', '0012_feedentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reports_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
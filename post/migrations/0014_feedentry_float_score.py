@@ -0,0 +1,18 @@
+# Generated by Django 4.2.3 on 2026-10-17 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0013_post_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='feedentry',
+            name='score',
+            field=models.FloatField(default=0),
+        ),
+    ]
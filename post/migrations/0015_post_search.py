@@ -0,0 +1,45 @@
+# Generated by Django 4.2.3 on 2026-10-17 13:10
+
+from django.db import migrations
+
+# The search table is not a model: its shape depends on the database, and it
+# is only read and written through post.search.
+
+CREATE = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE post_search USING fts5(content, comments, tokenize = 'porter unicode61')",
+        "INSERT INTO post_search (rowid, content, comments) "
+        "SELECT p.id, p.content, COALESCE((SELECT group_concat(c.body, ' ') FROM post_comment c "
+        "WHERE c.post_id = p.id), '') FROM post_post p WHERE NOT p.is_deleted AND NOT p.is_blocked",
+    ],
+    'postgresql': [
+        "CREATE TABLE post_search (post_id bigint PRIMARY KEY REFERENCES post_post (id) "
+        "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, document tsvector NOT NULL)",
+        "CREATE INDEX post_search_document_idx ON post_search USING GIN (document)",
+        "INSERT INTO post_search (post_id, document) "
+        "SELECT p.id, setweight(to_tsvector('english', COALESCE(p.content, '')), 'A') || setweight(to_tsvector('english', "
+        "COALESCE((SELECT string_agg(c.body, ' ' ORDER BY c.id) FROM post_comment c "
+        "WHERE c.post_id = p.id), '')), 'B') FROM post_post p WHERE NOT p.is_deleted AND NOT p.is_blocked",
+    ],
+}
+
+
+def create_search_table(apps, schema_editor):
+    for statement in CREATE.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE:
+        schema_editor.execute("DROP TABLE post_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0014_feedentry_float_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.3 on 2026-10-17 12:45
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_queue(apps, schema_editor):
+    # Reports carry no timestamp; the post's last update is the best guess
+    Post = apps.get_model('post', 'Post')
+    Post.objects.filter(is_blocked=False, reports_count__gt=0).update(
+        pending_reports=F('reports_count'), last_reported_at=F('updated_at'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0015_post_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='last_reported_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='pending_reports',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_blocked', False), ('pending_reports__gt', 0)), fields=['-pending_reports', '-last_reported_at', '-id'], name='post_moderation_queue_idx'),
+        ),
+        migrations.RunPython(fill_queue, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.3 on 2026-10-17 12:56
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def fill_actors(apps, schema_editor):
+    Notification = apps.get_model('post', 'Notification')
+    Notification.objects.update(updated=F('created'))
+    # recent_actors is JSON, so it is filled row by row in batches
+    batch = []
+    for notification in Notification.objects.exclude(from_user=None).only('id', 'from_user_id').iterator():
+        notification.recent_actors = [notification.from_user_id]
+        batch.append(notification)
+        if len(batch) == 1000:
+            Notification.objects.bulk_update(batch, ['recent_actors'])
+            batch = []
+    Notification.objects.bulk_update(batch, ['recent_actors'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0016_moderation_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='recent_actors',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='updated',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_seen', False)), fields=['to_user', 'notification_type', 'post', '-updated'], name='notification_coalesce_idx'),
+        ),
+        migrations.RunPython(fill_actors, migrations.RunPython.noop),
+    ]
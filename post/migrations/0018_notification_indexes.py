@@ -0,0 +1,21 @@
+# Generated by Django 4.2.3 on 2026-10-17 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0017_notification_coalescing'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_seen', False)), fields=['to_user', '-updated', '-id'], name='notification_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_seen', True)), fields=['updated'], name='notification_retention_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.3 on 2026-10-17 13:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0018_notification_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FanOut',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_follow_id', models.BigIntegerField(default=0)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='post.post')),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.3 on 2026-10-17 13:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0019_fanout_progress'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='comment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='post.comment'),
+        ),
+    ]
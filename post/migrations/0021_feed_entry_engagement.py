@@ -0,0 +1,28 @@
+# Generated by Django 4.2.3 on 2026-10-17 13:21
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def fill_engagement(apps, schema_editor):
+    # Entries were scored at some earlier engagement; `manage.py rebuild_feeds` makes them exact
+    FeedEntry = apps.get_model('post', 'FeedEntry')
+    Post = apps.get_model('post', 'Post')
+    engagement = Post.objects.filter(pk=OuterRef('post_id')).values(total=F('likes_count') + F('comments_count'))
+    FeedEntry.objects.update(engagement=Subquery(engagement))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0020_notification_comment_set_null'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedentry',
+            name='engagement',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_engagement, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from users.models import User
 from taggit.managers import TaggableManager
 from taggit.models import Tag
@@ -18,18 +19,41 @@ class Post(models.Model):
     is_blocked = models.BooleanField(default=False)
     reported_by_users = models.ManyToManyField(User, related_name='reported_posts', blank=True)
     tags = TaggableManager(blank=True)
+    likes_count = models.PositiveIntegerField(default=0)
+    reports_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    # Moderation queue: reports since the last block/unblock decision
+    pending_reports = models.PositiveIntegerField(default=0)
+    last_reported_at = models.DateTimeField(blank=True, null=True)
+
+    COUNTER_FIELDS = ('likes_count', 'reports_count', 'comments_count', 'pending_reports', 'last_reported_at')
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-pending_reports', '-last_reported_at', '-id'], name='post_moderation_queue_idx',
+                condition=models.Q(pending_reports__gt=0, is_blocked=False),
+            ),
+        ]
 
     def __str__(self):
         return self.content
+
+    def save(self, *args, **kwargs):
+        # Counters only change through F() updates; never write back a stale copy
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in self.COUNTER_FIELDS]
+        super().save(*args, **kwargs)
     
     def get_tags(self):
         return self.tags.names()
 
     def total_reports(self):
-        return self.reported_by_users.count()
+        return self.reports_count
 
     def total_likes(self):
-        return self.likes.count()
+        return self.likes_count
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, related_name="comments", on_delete=models.CASCADE)
@@ -62,10 +86,30 @@ class Notification(models.Model):
    from_user = models.ForeignKey(User, related_name="notification_from", on_delete=models.CASCADE, null=True)
    notification_type = models.CharField(choices=NOTIFICATION_TYPES, max_length=20)
    post  = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='+', blank=True, null=True)
-   comment  = models.ForeignKey('Comment', on_delete=models.CASCADE, related_name='+', blank=True, null=True)
+   # The latest comment of a merged notification; see notifications.detach_comment
+   comment  = models.ForeignKey('Comment', on_delete=models.SET_NULL, related_name='+', blank=True, null=True)
    created = models.DateTimeField(auto_now_add=True)
    is_seen = models.BooleanField(default=False)
-   
+   # Likes, follows and comments on the same target within a time window are
+   # merged into one row (see post.notifications.notify); from_user is the latest actor.
+   actor_count = models.PositiveIntegerField(default=1)
+   recent_actors = models.JSONField(default=list, blank=True)
+   updated = models.DateTimeField(default=timezone.now)
+
+   class Meta:
+        indexes = [
+            # A user's unseen notifications, newest first, and mark-seen by user
+            models.Index(
+                fields=['to_user', '-updated', '-id'], name='notification_inbox_idx', condition=models.Q(is_seen=False),
+            ),
+            models.Index(
+                fields=['to_user', 'notification_type', 'post', '-updated'], name='notification_coalesce_idx',
+                condition=models.Q(is_seen=False),
+            ),
+            # Seen rows past retention (see prune_notifications)
+            models.Index(fields=['updated'], name='notification_retention_idx', condition=models.Q(is_seen=True)),
+        ]
+
    def __str__(self):
         return f"{self.from_user} sent a {self.notification_type} notification to {self.to_user}"
 
@@ -75,4 +119,35 @@ class Interest(models.Model):
     interests = models.ManyToManyField(Tag, related_name='interests', blank=True)
 
     def __str__(self):
-        return self.user.first_name 
\ No newline at end of file
+        return self.user.first_name
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(User, related_name='feed_entries', on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, related_name='feed_entries', on_delete=models.CASCADE)
+    score = models.FloatField(default=0)
+    # Copied from the post so a user's feed can be read straight off the index.
+    created_at = models.DateTimeField()
+    # Likes + comments the score was computed with (see feed.rescore_posts)
+    engagement = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-score', '-created_at', '-post'], name='feed_entry_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} in feed of {self.user_id} ({self.score})"
+
+
+class FanOut(models.Model):
+    # A new post whose author's followers are still being notified (see post/fanout.py)
+    post = models.OneToOneField(Post, related_name='+', on_delete=models.CASCADE)
+    # Followers up to this Follow id have their notification
+    last_follow_id = models.BigIntegerField(default=0)
+    # Set by the process working on it and refreshed every chunk
+    claimed_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Fan-out of {self.post_id} after follow {self.last_follow_id}"
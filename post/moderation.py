@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Post, Notification
+from . import cache, feed, notifications, search
+
+# Bulk counterparts of BlockPostView / UnBlockPostView. A single UPDATE
+# flips every post, so none of the post_save receivers run; their work
+# (feeds, search index, cached responses) is done here for the whole batch.
+
+
+def block_posts(post_ids, moderator):
+    """Block the given posts that are not blocked yet and return their ids."""
+    with transaction.atomic():
+        posts = list(
+            Post.objects.select_for_update().filter(pk__in=post_ids, is_blocked=False).values_list('id', 'author_id')
+        )
+        blocked = [post_id for post_id, _ in posts]
+        Post.objects.filter(pk__in=blocked).update(is_blocked=True, pending_reports=0, updated_at=timezone.now())
+        notifications.bulk_notify([
+            Notification(
+                from_user=moderator,
+                to_user_id=author_id,
+                post_id=post_id,
+                notification_type=Notification.NOTIFICATION_TYPES[4][0],
+            )
+            for post_id, author_id in posts
+        ])
+        feed.remove_posts(blocked)
+        search.remove_posts(blocked)
+    cache.invalidate_feeds()
+    return blocked
+
+
+def unblock_posts(post_ids):
+    """Unblock the given blocked posts and return their ids."""
+    with transaction.atomic():
+        unblocked = list(
+            Post.objects.select_for_update().filter(pk__in=post_ids, is_blocked=True).values_list('id', flat=True)
+        )
+        Post.objects.filter(pk__in=unblocked).update(is_blocked=False, pending_reports=0, updated_at=timezone.now())
+        feed.schedule_refresh(unblocked)
+        search.index_posts(unblocked)
+    cache.invalidate_feeds()
+    return unblocked
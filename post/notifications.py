@@ -0,0 +1,252 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+import msgpack
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from users.models import User
+from .models import Comment, Notification
+from . import serializers
+
+# Notifications created with bulk_create send no post_save, so whoever
+# creates them in bulk counts and pushes them here. Every user keeps an
+# unread_notifications counter: raised here on create, lowered by mark_seen
+# and, through a post_delete receiver, when an unseen notification is deleted
+# (directly or by cascade from its post, comment or actor).
+#
+# Likes, follows and comments go through notify(), which folds them into the
+# recipient's latest unseen notification of the same type and post when it
+# was updated less than COALESCE_WINDOW seconds ago. A merged row is still one
+# unread notification; it is pushed again at most every PUSH_DEBOUNCE seconds.
+
+COALESCED_TYPES = ('like', 'follow', 'comment')
+COALESCE_WINDOW = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 3600)
+PUSH_DEBOUNCE = getattr(settings, 'NOTIFICATION_PUSH_DEBOUNCE', 10)
+# Actor ids kept on a row, newest first; also what repeat actors are recognised by
+RECENT_ACTORS = 20
+# 'json' sends text frames, 'msgpack' binary ones
+WIRE_FORMAT = getattr(settings, 'NOTIFICATION_WIRE_FORMAT', 'json')
+
+logger = logging.getLogger(__name__)
+
+
+def send_many(messages):
+    """Send (group, message) pairs through the channel layer in one event loop hop."""
+    if not messages:
+        return
+    channel_layer = get_channel_layer()
+
+    async def send_all():
+        await asyncio.gather(*(channel_layer.group_send(group, message) for group, message in messages))
+
+    async_to_sync(send_all)()
+
+
+def unseen_per_user(notifications):
+    """{number of unseen notifications: recipient ids with that many}"""
+    per_user = Counter(n.to_user_id for n in notifications if n.to_user_id and not n.is_seen)
+    by_amount = defaultdict(list)
+    for user_id, amount in per_user.items():
+        by_amount[amount].append(user_id)
+    return by_amount
+
+
+def count_unread(notifications):
+    """Add new notifications to their recipients' unread counters."""
+    # Fan-outs give everyone +1, so this is usually a single UPDATE
+    for amount, user_ids in unseen_per_user(notifications).items():
+        User.objects.filter(pk__in=user_ids).update(unread_notifications=F('unread_notifications') + amount)
+
+
+def uncount(notifications):
+    """Take deleted notifications that were still unseen off their recipients' counters."""
+    for amount, user_ids in unseen_per_user(notifications).items():
+        User.objects.filter(pk__in=user_ids).update(
+            unread_notifications=Greatest(F('unread_notifications') - amount, 0)
+        )
+
+
+def mark_seen(user_id, notifications):
+    """Mark the user's notifications among `notifications` seen; returns how many were unread."""
+    with transaction.atomic():
+        seen = notifications.filter(to_user_id=user_id, is_seen=False).update(is_seen=True)
+        if seen:
+            User.objects.filter(pk=user_id).update(
+                unread_notifications=Greatest(F('unread_notifications') - seen, 0)
+            )
+    return seen
+
+
+def encode_frame(frame):
+    """
+    The WebSocket frame exactly as NotificationConsumer sends it: str for a
+    text frame, bytes for a binary one. Encoded once here so consumers
+    forward it as is, whatever the number of sockets in the group.
+    """
+    if WIRE_FORMAT == 'msgpack':
+        return msgpack.packb(frame)
+    return json.dumps(frame, separators=(',', ':'))
+
+
+def push(notifications):
+    """Send notifications (with from_user loaded) and the new unread counts to their recipients."""
+    if not notifications:
+        return
+    # One serializer for the batch; building its fields is most of the cost
+    payloads = serializers.NotificationSerializer(notifications, many=True).data
+    unread = dict(User.objects.filter(pk__in={n.to_user_id for n in notifications})
+                  .values_list('id', 'unread_notifications'))
+    send_many([
+        (f"notify_{notification.to_user_id}", {
+            "type": "send_notification",
+            "frame": encode_frame({
+                "type": "notification",
+                "payload": payload,
+                "unread": unread.get(notification.to_user_id, 0),
+            }),
+        })
+        for notification, payload in zip(notifications, payloads)
+    ])
+
+
+def bulk_notify(notifications):
+    created = Notification.objects.bulk_create(notifications)
+    count_unread(created)
+    transaction.on_commit(lambda: push(created))
+    return created
+
+
+def debounced(notification):
+    # Leading edge: the first change in a debounce period is pushed at once, the rest by push_later
+    return not cache.add(f'notification-push:{notification.pk}', 1, timeout=PUSH_DEBOUNCE)
+
+
+# Trailing edge: notifications merged into while debounced, pushed once the period is over
+dirty = set()
+dirty_lock = threading.Lock()
+
+
+def push_later(notification_id):
+    with dirty_lock:
+        idle = not dirty
+        dirty.add(notification_id)
+    if idle:
+        timer = threading.Timer(PUSH_DEBOUNCE, push_dirty)
+        timer.daemon = True
+        timer.start()
+
+
+def push_dirty():
+    with dirty_lock:
+        notification_ids = list(dirty)
+        dirty.clear()
+    try:
+        pending = list(Notification.objects.select_related('from_user').filter(pk__in=notification_ids, is_seen=False))
+        # Starts the next debounce period of each
+        cache.set_many({f'notification-push:{n.pk}': 1 for n in pending}, timeout=PUSH_DEBOUNCE)
+        push(pending)
+    except Exception:
+        logger.exception("Pushing merged notifications failed")
+    finally:
+        close_old_connections()
+
+
+def notify(actor_ids, to_user_id, notification_type, post_id=None, comment=None):
+    """
+    Notify `to_user_id` that `actor_ids` (oldest first) liked, followed or
+    commented, merging into an open notification for the same target.
+    """
+    actor_ids = [actor_id for actor_id in dict.fromkeys(actor_ids) if actor_id != to_user_id]
+    if not actor_ids:
+        return None
+    now = timezone.now()
+    with transaction.atomic():
+        notification = None
+        if notification_type in COALESCED_TYPES:
+            notification = (
+                Notification.objects.select_for_update()
+                .filter(to_user_id=to_user_id, notification_type=notification_type, post_id=post_id,
+                        is_seen=False, updated__gte=now - timedelta(seconds=COALESCE_WINDOW))
+                .order_by('-updated').first()
+            )
+        if notification is None:
+            actors = actor_ids[::-1]
+            notification = Notification(
+                from_user_id=actors[0], to_user_id=to_user_id, notification_type=notification_type,
+                post_id=post_id, comment=comment, actor_count=len(actors),
+                recent_actors=actors[:RECENT_ACTORS], updated=now,
+            )
+            bulk_notify([notification])
+            cache.set(f'notification-push:{notification.pk}', 1, timeout=PUSH_DEBOUNCE)
+            return notification
+
+        # Unliking and liking again, or a second comment, is not a new actor
+        new = [actor_id for actor_id in actor_ids if actor_id not in notification.recent_actors]
+        actors = list(dict.fromkeys(actor_ids[::-1] + notification.recent_actors))
+        notification.actor_count += len(new)
+        notification.recent_actors = actors[:RECENT_ACTORS]
+        notification.from_user_id = actors[0]
+        notification.updated = now
+        fields = ['actor_count', 'recent_actors', 'from_user', 'updated']
+        if comment is not None:
+            notification.comment = comment
+            fields.append('comment')
+        notification.save(update_fields=fields)
+    if debounced(notification):
+        transaction.on_commit(lambda: push_later(notification.pk))
+    else:
+        transaction.on_commit(lambda: push(list(Notification.objects.select_related('from_user').filter(pk=notification.pk))))
+    return notification
+
+
+def detach_comment(comment):
+    """
+    Point notifications away from a comment about to be deleted. A merged
+    notification stands for other commenters too, so it moves to the newest
+    remaining comment of its actors and is only deleted when none is left.
+    """
+    for notification in Notification.objects.filter(comment=comment):
+        replacement = (
+            Comment.objects.filter(post_id=comment.post_id, user_id__in=notification.recent_actors)
+            .exclude(pk=comment.pk).order_by('-id').first()
+        )
+        if replacement is None and notification.actor_count <= 1:
+            notification.delete()
+        else:
+            notification.comment = replacement
+            notification.save(update_fields=['comment'])
+
+
+def prune_seen(cutoff, chunk_size=1000, archive=None):
+    """
+    Delete seen notifications last updated before `cutoff`, `chunk_size`
+    rows per transaction, oldest first; yields the number deleted per chunk.
+    `archive(rows)` gets each chunk's rows as dicts before they are deleted.
+    Every chunk commits on its own, so an interrupted run resumes where it
+    stopped when started again.
+    """
+    expired = Notification.objects.filter(is_seen=True, updated__lt=cutoff).order_by('updated', 'id')
+    while True:
+        with transaction.atomic():
+            if archive is None:
+                ids = list(expired.values_list('id', flat=True)[:chunk_size])
+            else:
+                rows = list(expired.values()[:chunk_size])
+                ids = [row['id'] for row in rows]
+                if rows:
+                    archive(rows)
+            if not ids:
+                return
+            deleted = Notification.objects.filter(pk__in=ids).delete()[0]
+        yield deleted
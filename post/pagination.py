@@ -0,0 +1,213 @@
+import base64
+import bisect
+import binascii
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on the ordering of the queryset, e.g. (created_at, id).
+
+    The queryset may also be a list of querysets that are read one after the
+    other (the ranked feed followed by its recency tail). Each segment is
+    paginated on its own ordering, so the cursor records which segment it
+    points into together with the ordering values of the last row served.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        segments = list(queryset) if isinstance(queryset, (list, tuple)) else [queryset]
+        self.page_size = self.get_page_size(request)
+        start, position = self.decode_cursor(request)
+        if start >= len(segments):
+            raise NotFound(self.invalid_cursor_message)
+
+        # Fetch one row more than needed to find out whether a next page exists
+        rows = []
+        for index in range(start, len(segments)):
+            segment = segments[index]
+            if index == start and position is not None:
+                segment = segment.filter(self.keyset_filter(segment, position))
+            rows.extend((index, item) for item in segment[:self.page_size + 1 - len(rows)])
+            if len(rows) > self.page_size:
+                break
+
+        self.next_cursor = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            index, item = rows[-1]
+            self.next_cursor = self.encode_cursor(index, [
+                getattr(item, field) for field, _ in self.get_ordering(segments[index])
+            ])
+        return [item for _, item in rows]
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.next_cursor, 'results': data})
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering(self, queryset):
+        ordering = []
+        for term in queryset.query.order_by:
+            ordering.append((term.lstrip('-'), term.startswith('-')))
+        return ordering
+
+    def get_field(self, queryset, name):
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        model = queryset.model
+        for part in name.split('__'):
+            field = model._meta.get_field(part)
+            model = field.related_model
+        return field.target_field if field.is_relation else field
+
+    def cursor_values(self, queryset, values):
+        """The cursor's values as the ordering fields' Python types; a cursor is client input."""
+        ordering = self.get_ordering(queryset)
+        if len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [self.get_field(queryset, field).to_python(value) for (field, _), value in zip(ordering, values)]
+        except (ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(value is None for value in values):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def keyset_filter(self, queryset, values):
+        ordering = self.get_ordering(queryset)
+        values = self.cursor_values(queryset, values)
+
+        # (a, b, c) after (x, y, z) is a < x OR (a = x AND b < y) OR ...
+        condition = Q()
+        equal = {}
+        for (field, descending), value in zip(ordering, values):
+            lookup = 'lt' if descending else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return condition
+
+    def encode_cursor(self, segment, values):
+        values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+        payload = json.dumps([segment, values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request):
+        return self.decode(request.query_params.get(self.cursor_query_param))
+
+    def decode(self, cursor):
+        if not cursor:
+            return 0, None
+        try:
+            segment, values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(segment, int) or segment < 0 or not isinstance(values, list):
+                raise ValueError
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        return segment, values
+
+
+class RankedPagination(KeysetPagination):
+    """
+    Keyset pagination over (rank, id) hits of a search backend, lower ranks
+    first. `search(after, limit)` returns the hits following `after`.
+    """
+
+    def paginate_search(self, search, request):
+        self.page_size = self.get_page_size(request)
+        segment, position = self.decode_cursor(request)
+        if segment != 0 or (position is not None and len(position) != 2):
+            raise NotFound(self.invalid_cursor_message)
+        if position is not None:
+            # Passed on to the backend's SQL as they are
+            try:
+                position = [float(position[0]), int(position[1])]
+            except (ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+
+        hits = search(position, self.page_size + 1)
+        self.next_cursor = None
+        if len(hits) > self.page_size:
+            hits = hits[:self.page_size]
+            self.next_cursor = self.encode_cursor(0, list(hits[-1]))
+        return hits
+
+
+class SortedListPagination(KeysetPagination):
+    """Keyset pagination over an in-memory list sorted on `keys`."""
+
+    def paginate_sorted(self, items, keys, request):
+        self.page_size = self.get_page_size(request)
+        segment, position = self.decode_cursor(request)
+        if segment != 0:
+            raise NotFound(self.invalid_cursor_message)
+
+        start = 0
+        if position is not None:
+            try:
+                start = bisect.bisect_right(keys, tuple(position))
+            except TypeError:
+                raise NotFound(self.invalid_cursor_message)
+        end = start + self.page_size
+        self.next_cursor = None
+        if end < len(items):
+            self.next_cursor = self.encode_cursor(0, list(keys[end - 1]))
+        return items[start:end]
+
+
+class SincePagination(KeysetPagination):
+    """
+    Keyset pagination, newest first, plus a delta mode for polling.
+
+    The first page also returns a `since` token marking its newest row. A
+    request with `?since=` answers only rows that sort after that mark, so
+    an idle poll is one range query that finds nothing. Deltas come oldest
+    first with a fresh `since` each time, and `more` says when a full page
+    left rows for the next poll.
+    """
+    since_query_param = 'since'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.since = self.more = None
+        since = request.query_params.get(self.since_query_param)
+        if since is None:
+            page = super().paginate_queryset(queryset, request, view)
+            if page and not request.query_params.get(self.cursor_query_param):
+                self.since = self.encode_row(queryset, page[0])
+            return page
+
+        segment, position = self.decode(since)
+        if segment != 0 or position is None:
+            raise NotFound(self.invalid_cursor_message)
+        self.page_size = self.get_page_size(request)
+        self.next_cursor = None
+        # The same keyset walked the other way
+        ordering = self.get_ordering(queryset)
+        newer = queryset.order_by(*(field if descending else f'-{field}' for field, descending in ordering))
+        rows = list(newer.filter(self.keyset_filter(newer, position))[:self.page_size + 1])
+        self.more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.since = self.encode_row(queryset, rows[-1]) if rows else since
+        return rows
+
+    def encode_row(self, queryset, row):
+        return self.encode_cursor(0, [getattr(row, field) for field, _ in self.get_ordering(queryset)])
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.next_cursor, 'since': self.since, 'more': self.more, 'results': data})
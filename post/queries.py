@@ -0,0 +1,34 @@
+from django.db.models import Prefetch
+
+from users.models import User
+from .models import Post, Comment, Follow
+
+# Queryset builders for the post and user serializers. Everything the nested
+# serializers touch is prefetched up front (counts are columns on the models),
+# so serializing a page costs a fixed number of queries whatever its size.
+
+
+def user_queryset(queryset=None):
+    if queryset is None:
+        queryset = User.objects.all()
+    return queryset.prefetch_related(
+        Prefetch('followers', queryset=Follow.objects.select_related('follower')),
+        Prefetch('following', queryset=Follow.objects.select_related('following')),
+    )
+
+
+def comment_queryset(queryset=None):
+    if queryset is None:
+        queryset = Comment.objects.all()
+    return queryset.prefetch_related(Prefetch('user', queryset=user_queryset()))
+
+
+def post_queryset(queryset=None):
+    if queryset is None:
+        queryset = Post.objects.all()
+    return queryset.prefetch_related(
+        Prefetch('author', queryset=user_queryset()),
+        Prefetch('comments', queryset=comment_queryset()),
+        Prefetch('likes', queryset=User.objects.only('id')),
+        'tags',
+    )
@@ -0,0 +1,153 @@
+import heapq
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from taggit.models import TaggedItem
+
+from .models import Post, Interest
+
+# A post loses half of its weight every FEED_HALF_LIFE_HOURS.
+HALF_LIFE = getattr(settings, 'FEED_HALF_LIFE_HOURS', 48) * 3600
+ENGAGEMENT_WEIGHT = getattr(settings, 'FEED_ENGAGEMENT_WEIGHT', 0.5)
+# Other processes change tags and interests too, so the index is rebuilt from
+# the database once it is this many seconds old.
+INDEX_TTL = getattr(settings, 'RANKING_INDEX_TTL', 300)
+
+
+def engagement_score(engagement):
+    return ENGAGEMENT_WEIGHT * math.log1p(engagement)
+
+
+def rank_score(overlap, engagement, created_ts):
+    """
+    log(overlap * (1 + engagement)^w * 2^(-age / half_life)), minus the part
+    that only depends on the current time. Dropping that term keeps the order
+    the same at any moment, so stored scores never need to be decayed.
+    """
+    return (
+        math.log(overlap)
+        + engagement_score(engagement)
+        + created_ts * math.log(2) / HALF_LIFE
+    )
+
+
+class RankingIndex:
+    """
+    In-memory post x tag and user x tag incidence matrices.
+
+    Both are 0/1 sparse matrices kept as rows (id -> frozenset of tag ids)
+    plus their transposes (tag id -> set of ids). The tag overlap of a user
+    with every post is the sparse product of the user's row with the
+    post-tag matrix, computed by walking the postings of the user's tags.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.built_at = None
+
+    def build(self):
+        post_type = ContentType.objects.get_for_model(Post)
+        visible = Post.objects.filter(is_deleted=False, is_blocked=False)
+        meta = {
+            post_id: (created_at, likes + comments)
+            for post_id, created_at, likes, comments in visible.values_list(
+                'id', 'created_at', 'likes_count', 'comments_count')
+        }
+        post_tags = defaultdict(set)
+        for post_id, tag_id in TaggedItem.objects.filter(content_type=post_type).values_list('object_id', 'tag_id'):
+            if post_id in meta:
+                post_tags[post_id].add(tag_id)
+        user_tags = defaultdict(set)
+        for user_id, tag_id in Interest.interests.through.objects.values_list('interest__user_id', 'tag_id'):
+            user_tags[user_id].add(tag_id)
+
+        with self.lock:
+            self.post_meta = meta
+            self.post_tags, self.tag_posts = {}, defaultdict(set)
+            self.user_tags, self.tag_users = {}, defaultdict(set)
+            for post_id, tags in post_tags.items():
+                self._set_row(self.post_tags, self.tag_posts, post_id, tags)
+            for user_id, tags in user_tags.items():
+                self._set_row(self.user_tags, self.tag_users, user_id, tags)
+            self.built_at = time.monotonic()
+
+    def ensure_built(self):
+        if self.built_at is None or time.monotonic() - self.built_at > INDEX_TTL:
+            self.build()
+
+    def _set_row(self, rows, columns, key, tags):
+        for tag_id in rows.pop(key, ()):
+            columns[tag_id].discard(key)
+        if tags:
+            rows[key] = frozenset(tags)
+            for tag_id in tags:
+                columns[tag_id].add(key)
+
+    def update_post(self, post):
+        self.ensure_built()
+        tags = set()
+        if not post.is_deleted and not post.is_blocked:
+            tags = set(post.tags.values_list('id', flat=True))
+        with self.lock:
+            self._set_row(self.post_tags, self.tag_posts, post.id, tags)
+            if tags:
+                self.post_meta[post.id] = (post.created_at, post.likes_count + post.comments_count)
+            else:
+                self.post_meta.pop(post.id, None)
+
+    def update_engagement(self, engagement):
+        """Apply {post id: likes + comments} to indexed posts."""
+        if self.built_at is None:
+            return
+        with self.lock:
+            for post_id, total in engagement.items():
+                if post_id in self.post_meta:
+                    self.post_meta[post_id] = (self.post_meta[post_id][0], total)
+
+    def remove_posts(self, post_ids):
+        if self.built_at is None:
+            return
+        with self.lock:
+            for post_id in post_ids:
+                self._set_row(self.post_tags, self.tag_posts, post_id, ())
+                self.post_meta.pop(post_id, None)
+
+    def update_user(self, user_id):
+        self.ensure_built()
+        tags = set(Interest.interests.through.objects.filter(
+            interest__user_id=user_id).values_list('tag_id', flat=True))
+        with self.lock:
+            self._set_row(self.user_tags, self.tag_users, user_id, tags)
+
+    def rank_posts(self, user_id, limit):
+        """Top `limit` (score, created_at, post id, engagement) for a user, best first."""
+        self.ensure_built()
+        with self.lock:
+            overlap = Counter()
+            for tag_id in self.user_tags.get(user_id, ()):
+                overlap.update(self.tag_posts.get(tag_id, ()))
+            scored = []
+            for post_id, shared in overlap.items():
+                created_at, engagement = self.post_meta[post_id]
+                scored.append((rank_score(shared, engagement, created_at.timestamp()), created_at, post_id, engagement))
+        return heapq.nlargest(limit, scored)
+
+    def rank_users(self, post_id):
+        """Score of a post for every user sharing at least one tag with it."""
+        self.ensure_built()
+        with self.lock:
+            if post_id not in self.post_meta:
+                return {}
+            overlap = Counter()
+            for tag_id in self.post_tags[post_id]:
+                overlap.update(self.tag_users.get(tag_id, ()))
+            created_at, engagement = self.post_meta[post_id]
+        created_ts = created_at.timestamp()
+        return {user_id: rank_score(shared, engagement, created_ts) for user_id, shared in overlap.items()}
+
+
+index = RankingIndex()
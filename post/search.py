@@ -0,0 +1,184 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Post, Comment
+
+# Full-text index over visible posts: one document per post holding its
+# content and the bodies of its comments. The shadow table is created by
+# migration 0015 in whichever form the database supports and is kept in sync
+# by post.signals; `manage.py reindex_search` rebuilds it from scratch.
+#
+# Results are (rank, post id) pairs where a lower rank is a better match, so
+# callers can keyset paginate on (rank, id) whatever the backend.
+
+TABLE = 'post_search'
+WORD = re.compile(r'\w+')
+
+
+def document(post_id):
+    post = Post.objects.filter(pk=post_id, is_deleted=False, is_blocked=False).values('content').first()
+    if post is None:
+        return None
+    bodies = Comment.objects.filter(post_id=post_id).order_by('id').values_list('body', flat=True)
+    return post['content'], ' '.join(bodies)
+
+
+class SQLiteBackend:
+    """FTS5 table keyed by rowid = post id, ranked with bm25."""
+    # bm25 weights of the content and comments columns
+    weights = (4.0, 1.0)
+
+    def index(self, post_id, content, comments):
+        # to_tsvector(NULL) is NULL, and so is anything concatenated with it
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+            cursor.execute(f'INSERT INTO {TABLE} (rowid, content, comments) VALUES (%s, %s, %s)',
+                           [post_id, content, comments])
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [[post_id] for post_id in post_ids])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+            cursor.execute(
+                f"INSERT INTO {TABLE} (rowid, content, comments) "
+                f"SELECT p.id, p.content, COALESCE((SELECT group_concat(c.body, ' ') FROM post_comment c "
+                f"WHERE c.post_id = p.id), '') FROM post_post p WHERE NOT p.is_deleted AND NOT p.is_blocked"
+            )
+            total = cursor.rowcount
+            cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+            return total
+
+    def match(self, query):
+        # Every word must appear, the last one as a prefix (search as you type)
+        words = WORD.findall(query)
+        if not words:
+            return None
+        terms = [f'"{word}"' for word in words]
+        terms[-1] += '*'
+        return ' '.join(terms)
+
+    def search(self, query, after, limit):
+        match = self.match(query)
+        if match is None:
+            return []
+        sql = (f'SELECT score, id FROM (SELECT bm25({TABLE}, %s, %s) AS score, rowid AS id '
+               f'FROM {TABLE} WHERE {TABLE} MATCH %s)')
+        params = [*self.weights, match]
+        if after is not None:
+            sql += ' WHERE score > %s OR (score = %s AND id > %s)'
+            params += [after[0], after[0], after[1]]
+        sql += ' ORDER BY score, id LIMIT %s'
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + [limit])
+            return cursor.fetchall()
+
+
+class PostgreSQLBackend:
+    """Weighted tsvector column behind a GIN index, ranked with ts_rank_cd."""
+    config = 'english'
+
+    def index(self, post_id, content, comments):
+        # to_tsvector(NULL) is NULL, and so is anything concatenated with it
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {TABLE} (post_id, document) VALUES (%s, "
+                f"setweight(to_tsvector(%s, %s), 'A') || setweight(to_tsvector(%s, %s), 'B')) "
+                f"ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document",
+                [post_id, self.config, content or '', self.config, comments or ''],
+            )
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE post_id = ANY(%s)', [list(post_ids)])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {TABLE}')
+            cursor.execute(
+                f"INSERT INTO {TABLE} (post_id, document) "
+                f"SELECT p.id, setweight(to_tsvector(%s, COALESCE(p.content, '')), 'A') || setweight(to_tsvector(%s, "
+                f"COALESCE((SELECT string_agg(c.body, ' ' ORDER BY c.id) FROM post_comment c "
+                f"WHERE c.post_id = p.id), '')), 'B') FROM post_post p WHERE NOT p.is_deleted AND NOT p.is_blocked",
+                [self.config, self.config],
+            )
+            return cursor.rowcount
+
+    def search(self, query, after, limit):
+        if not WORD.search(query):
+            return []
+        # Negated so that, as with bm25, a lower rank is a better match
+        sql = (f'SELECT score, id FROM (SELECT -ts_rank_cd(document, q)::float8 AS score, post_id AS id '
+               f'FROM {TABLE}, websearch_to_tsquery(%s, %s) q WHERE document @@ q) hits')
+        params = [self.config, query]
+        if after is not None:
+            sql += ' WHERE score > %s OR (score = %s AND id > %s)'
+            params += [after[0], after[0], after[1]]
+        sql += ' ORDER BY score, id LIMIT %s'
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + [limit])
+            return cursor.fetchall()
+
+
+class ScanBackend:
+    """Unranked icontains scan for databases without full-text support."""
+
+    def index(self, post_id, content, comments):
+        pass
+
+    def remove(self, post_ids):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def search(self, query, after, limit):
+        if not query.strip():
+            return []
+        matches = Post.objects.filter(
+            Q(content__icontains=query) | Q(comments__body__icontains=query), is_deleted=False, is_blocked=False,
+        )
+        if after is not None:
+            matches = matches.filter(id__gt=after[1])
+        ids = matches.order_by('id').values_list('id', flat=True).distinct()[:limit]
+        return [(0.0, post_id) for post_id in ids]
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgresql': PostgreSQLBackend,
+}
+
+
+def get_backend():
+    return BACKENDS.get(connection.vendor, ScanBackend)()
+
+
+def index_post(post_id):
+    backend = get_backend()
+    doc = document(post_id)
+    if doc is None:
+        backend.remove([post_id])
+    else:
+        backend.index(post_id, *doc)
+
+
+def index_posts(post_ids):
+    for post_id in post_ids:
+        index_post(post_id)
+
+
+def remove_posts(post_ids):
+    get_backend().remove(post_ids)
+
+
+def rebuild():
+    return get_backend().rebuild()
+
+
+def search_posts(query, after=None, limit=20):
+    return get_backend().search(query, after, limit)
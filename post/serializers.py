@@ -3,41 +3,157 @@ from taggit.serializers import TaggitSerializer, TagListSerializerField
 from .models import Post, Comment, Follow, Notification, Interest
 from users.models import User
 from taggit.models import Tag
+from django.db import models
+from django.db.models import Q
 from django.forms.models import model_to_dict
 from django.utils.timesince import timesince
+from rest_framework.exceptions import NotFound
+from . import likes
+from .pagination import KeysetPagination
+from .viewer import ViewerState
 import os
 
-class UserSerializer(serializers.ModelSerializer):
-    follower_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
-    followers = serializers.SerializerMethodField()
-    following = serializers.SerializerMethodField()
-    total_posts = serializers.SerializerMethodField()
 
-    def get_follower_count(self, obj):
-        return obj.followers.count()
+def follows_of(user, relation, related):
+    # Reuse follows prefetched by post.queries, otherwise join the other side in
+    if relation in getattr(user, '_prefetched_objects_cache', {}):
+        return getattr(user, relation).all()
+    return getattr(user, relation).select_related(related)
+
+
+def query_list(request, param):
+    if request is None:
+        return []
+    value = request.query_params.get(param, '')
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class IdListSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+
+
+class LikeSerializer(serializers.Serializer):
+    liked = serializers.BooleanField()
+
+
+class SeenSerializer(serializers.Serializer):
+    """Which items to mark seen: an id list, or everything up to an id or a time."""
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False,
+                                allow_empty=False, max_length=1000)
+    up_to_id = serializers.IntegerField(min_value=1, required=False)
+    up_to = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        if len(data) != 1:
+            raise serializers.ValidationError("Provide exactly one of ids, up_to_id or up_to.")
+        return data
+
+    def selection(self, timestamp_field):
+        data = self.validated_data
+        if 'ids' in data:
+            return Q(pk__in=data['ids'])
+        if 'up_to_id' in data:
+            return Q(pk__lte=data['up_to_id'])
+        return Q(**{f'{timestamp_field}__lte': data['up_to']})
+
+
+class NotificationSeenSerializer(SeenSerializer):
+    """
+    Merged notifications keep their id but move forward, so instead of an id
+    the watermark is the `since` token of the notification list: everything
+    up to that (updated, id) is seen, rows merged into after it are not.
+    """
+    up_to_id = None
+    up_to_since = serializers.CharField(required=False)
+
+    def validate(self, data):
+        if len(data) != 1:
+            raise serializers.ValidationError("Provide exactly one of ids, up_to_since or up_to.")
+        return data
+
+    def validate_up_to_since(self, value):
+        pagination = KeysetPagination()
+        try:
+            segment, position = pagination.decode(value)
+            if segment != 0 or position is None:
+                raise NotFound
+            # Same ordering as NotificationsView, which handed out the token
+            return tuple(pagination.cursor_values(Notification.objects.order_by('-updated', '-id'), position))
+        except NotFound:
+            raise serializers.ValidationError("Invalid token.")
+
+    def selection(self, timestamp_field='updated'):
+        if 'up_to_since' in self.validated_data:
+            updated, pk = self.validated_data['up_to_since']
+            return Q(updated__lt=updated) | Q(updated=updated, pk__lte=pk)
+        return super().selection(timestamp_field)
+
+
+class SparseFieldsMixin:
+    """
+    Trims a serializer to the fields asked for with ?fields=a,b or a named set
+    from Meta.field_sets (?fields=card). With ?fields or ?expand present, the
+    fields in Meta.compact_fields switch to their compact form unless named in
+    ?expand. Only the serializer built with the request in its context reacts,
+    so nested serializers are left alone.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if fields is None:
+            fields = query_list(request, 'fields')
+        if expand is None:
+            expand = query_list(request, 'expand')
+        if not fields and not expand:
+            return
+
+        if fields:
+            field_sets = getattr(self.Meta, 'field_sets', {})
+            allowed = set()
+            for name in fields:
+                allowed.update(field_sets.get(name, [name]))
+            for name in list(self.fields):
+                if name not in allowed:
+                    self.fields.pop(name)
+
+        for name, compact_field in getattr(self.Meta, 'compact_fields', {}).items():
+            if name in self.fields and name not in expand:
+                self.fields[name] = compact_field()
+
+
+class UserCardSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'email', 'first_name', 'last_name', 'profile_image', 'is_online']
+
 
-    def get_following_count(self, obj):
-        return obj.following.count()
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    follower_count = serializers.IntegerField(read_only=True)
+    following_count = serializers.IntegerField(read_only=True)
+    followers = serializers.SerializerMethodField()
+    following = serializers.SerializerMethodField()
+    total_posts = serializers.IntegerField(source='posts_count', read_only=True)
 
     def get_followers(self, obj):
-        followers = obj.followers.all()
+        followers = follows_of(obj, 'followers', 'follower')
         follower_serializer = FollowSerializer(followers, many=True)
         return follower_serializer.data
 
     def get_following(self, obj):
-        following = obj.following.all()
+        following = follows_of(obj, 'following', 'following')
         following_serializer = FollowSerializer(following, many=True)
         return following_serializer.data
 
-    def get_total_posts(self, obj):
-        return obj.post_set.filter(is_deleted=False).count()
-
     class Meta:
         model = User
         fields = ['id', 'email', 'first_name', 'last_name', 'age', 'is_superuser', 'is_active', 'is_online', 
                   'gender', 'profile_image', 'follower_count', 'following_count', 'followers', 'following', 
                   'total_posts', 'country', 'education', 'work']
+        field_sets = {
+            'card': UserCardSerializer.Meta.fields + ['follower_count', 'following_count', 'total_posts'],
+        }
 
 
 class UserNotifySerializer(serializers.ModelSerializer):
@@ -58,6 +174,10 @@ class CommentSerializer(serializers.ModelSerializer):
         return timesince(obj.created)
 
 
+class CommentCardSerializer(CommentSerializer):
+    user = UserCardSerializer(read_only=True)
+
+
 class FollowSerializer(serializers.ModelSerializer):
     following = serializers.SlugRelatedField(slug_field='email', queryset=User.objects.all())
     follower = serializers.SlugRelatedField(slug_field='email', queryset=User.objects.all())
@@ -67,22 +187,77 @@ class FollowSerializer(serializers.ModelSerializer):
         fields = ['following', 'follower']
 
 
-class PostSerializer(TaggitSerializer, serializers.ModelSerializer):
+def viewer_of(context):
+    request = context.get('request')
+    return request.user if request is not None else None
+
+
+class PostListSerializer(serializers.ListSerializer):
+    """
+    Resolves the requesting user's likes, reports and follows for the whole
+    page at once, and leaves out the full liker ids unless ?expand=likes.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'likes' not in query_list(self.context.get('request'), 'expand'):
+            self.child.fields.pop('likes', None)
+
+    def to_representation(self, data):
+        posts = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.context['viewer'] = ViewerState(viewer_of(self.context), posts)
+        return super().to_representation(posts)
+
+
+class PostSerializer(SparseFieldsMixin, TaggitSerializer, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
+    likes = serializers.SerializerMethodField()
     likes_count = serializers.SerializerMethodField()
-    reports_count = serializers.SerializerMethodField()
+    reports_count = serializers.IntegerField(read_only=True)
+    comments_count = serializers.IntegerField(read_only=True)
+    pending_reports = serializers.IntegerField(read_only=True)
+    last_reported_at = serializers.DateTimeField(read_only=True)
     comments = CommentSerializer(many=True, read_only=True)
     followers = serializers.SerializerMethodField()
     tags = TagListSerializerField()
+    has_liked = serializers.SerializerMethodField()
+    has_reported = serializers.SerializerMethodField()
+    follows_author = serializers.SerializerMethodField()
+    liked_by = serializers.SerializerMethodField()
+
+    def get_viewer(self, obj):
+        # PostListSerializer resolves the whole page up front
+        if 'viewer' in self.context:
+            return self.context['viewer']
+        if getattr(self, '_viewer', None) is None:
+            self._viewer = ViewerState(viewer_of(self.context), [obj])
+        return self._viewer
+
+    def get_has_liked(self, obj):
+        return self.get_viewer(obj).has_liked(obj)
+
+    def get_has_reported(self, obj):
+        return self.get_viewer(obj).has_reported(obj)
+
+    def get_follows_author(self, obj):
+        return self.get_viewer(obj).follows_author(obj)
+
+    def get_liked_by(self, obj):
+        return UserCardSerializer(self.get_viewer(obj).liked_by(obj), many=True, context=self.context).data
+
+    def get_likes(self, obj):
+        # Stored likers with the like buffer's unflushed changes applied
+        user_ids = [user.id for user in obj.likes.all()]
+        buffered = likes.buffer.liked(obj.id)
+        if buffered:
+            user_ids = [user_id for user_id in user_ids if buffered.get(user_id, True)]
+            user_ids += [user_id for user_id, liked in buffered.items() if liked and user_id not in user_ids]
+        return user_ids
 
     def get_likes_count(self, obj):
-        return obj.total_likes()
-    
-    def get_reports_count(self, obj):
-        return obj.total_reports()
+        return obj.likes_count + likes.buffer.delta(obj.id)
 
     def get_followers(self, obj):
-        followers = Follow.objects.filter(following=obj.author).select_related('follower')
+        followers = follows_of(obj.author, 'followers', 'follower')
         follower_serializer = FollowSerializer(instance=followers, many=True, context=self.context)
         return follower_serializer.data
     
@@ -102,8 +277,18 @@ class PostSerializer(TaggitSerializer, serializers.ModelSerializer):
 
     class Meta:
         model = Post
+        list_serializer_class = PostListSerializer
         fields = ['id', 'post_img', 'content', 'created_at', 'updated_at', 'likes', 'likes_count', 'author', 
-                  'comments', 'followers', 'reports_count', 'tags', 'is_deleted', 'is_blocked']
+                  'comments', 'comments_count', 'followers', 'reports_count', 'pending_reports', 'last_reported_at',
+                  'tags', 'is_deleted', 'is_blocked', 'has_liked', 'has_reported', 'follows_author', 'liked_by']
+        field_sets = {
+            'card': ['id', 'post_img', 'content', 'created_at', 'author', 'likes_count', 'comments_count', 'tags',
+                     'has_liked', 'liked_by'],
+        }
+        compact_fields = {
+            'author': lambda: UserCardSerializer(read_only=True),
+            'comments': lambda: CommentCardSerializer(many=True, read_only=True),
+        }
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -111,7 +296,8 @@ class NotificationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Notification
-        fields = '__all__'
+        fields = ('id', 'to_user', 'from_user', 'notification_type', 'post', 'comment', 'created', 'updated',
+                  'is_seen', 'actor_count', 'recent_actors')
         read_only_fields = ('notification_type',)
 
     def validate_notification_type(self, value):
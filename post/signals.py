@@ -1,39 +1,91 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from .models import Notification, Comment
-from .serializers import NotificationSerializer
-import json
+from taggit.models import Tag
+from .models import Notification, Comment, Post, Interest, Follow
+from . import cache, feed, notifications, search
+from .tag_index import index as tag_index
 
 @receiver(post_save, sender=Notification)
 def notification_post_save_handler(sender, instance, created, **kwargs):
-    user = instance.to_user
-    if user.is_authenticated:
-        channel_layer = get_channel_layer()
-        if created:
-            count = Notification.objects.filter(is_seen=False, to_user=user).count()
-            serialized_instance = NotificationSerializer(instance).data
-            async_to_sync(channel_layer.group_send)(
-                f"notify_{user.id}",
-                {
-                    "type": "send_notification",
-                    "value": json.dumps(serialized_instance),
-                }
-            )
+    if created:
+        notifications.count_unread([instance])
+        notifications.push([instance])
+
+@receiver(post_delete, sender=Notification)
+def notification_post_delete_handler(sender, instance, **kwargs):
+    notifications.uncount([instance])
 
 @receiver(post_save, sender=Comment)
 def create_commen_notification(sender, instance, created, **kwargs):
     if created:
         # Check if the commenter is not the author of the post
-        if instance.user != instance.post.author:
-            Notification.objects.create(
-                from_user=instance.user,
-                to_user=instance.post.author,
-                post=instance.post,
-                comment=instance,
-                notification_type=Notification.NOTIFICATION_TYPES[3][0],
+        if instance.user_id != instance.post.author_id:
+            notifications.notify(
+                [instance.user_id], instance.post.author_id, Notification.NOTIFICATION_TYPES[3][0],
+                post_id=instance.post_id, comment=instance,
             )
 
 
+@receiver(pre_delete, sender=Comment)
+def detach_comment_notifications(sender, instance, **kwargs):
+    notifications.detach_comment(instance)
+
+
+@receiver(post_save, sender=Post)
+def refresh_post_feeds(sender, instance, created, **kwargs):
+    feed.schedule_refresh([instance.id])
+    search.index_post(instance.id)
+    cache.invalidate_feeds()
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    feed.remove_posts([instance.id])
+    search.remove_posts([instance.id])
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def reindex_commented_post(sender, instance, **kwargs):
+    search.index_post(instance.post_id)
+    # comments_count moves in the same transaction; the rescore runs after it commits
+    feed.schedule_rescore([instance.post_id])
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def refresh_tagged_post_feeds(sender, instance, action, **kwargs):
+    if isinstance(instance, Post) and action in ('post_add', 'post_remove', 'post_clear'):
+        feed.schedule_refresh([instance.id])
+
+
+@receiver(m2m_changed, sender=Interest.interests.through)
+def rebuild_interest_feeds(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        feed.rebuild_user_feed(instance.user_id)
+        cache.invalidate_user_feed(instance.user_id)
+    elif pk_set:
+        for user_id in Interest.objects.filter(pk__in=pk_set).values_list('user_id', flat=True):
+            feed.rebuild_user_feed(user_id)
+            cache.invalidate_user_feed(user_id)
+
+
+# Likes and reports are written through their auto-created M2M models, which
+# send no save/delete signals; LikeView and ReportPostView invalidate the
+# acting user's feed directly.
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_feed_cache(sender, **kwargs):
+    cache.invalidate_feeds()
+
+
+@receiver(post_save, sender=Tag)
+def index_tag(sender, instance, **kwargs):
+    cache.bump_version('tags')
+    tag_index.update_tag(instance.id, instance.name)
+
 
+@receiver(post_delete, sender=Tag)
+def unindex_tag(sender, instance, **kwargs):
+    cache.bump_version('tags')
+    tag_index.remove_tag(instance.id)
@@ -0,0 +1,177 @@
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count
+from taggit.models import Tag, TaggedItem
+
+from . import cache
+from .models import Post
+
+# Substring queries shorter than this scan the name list instead of the
+# trigram postings.
+GRAM = 3
+CATALOG_TTL = getattr(settings, 'TAG_CATALOG_TTL', 300)
+INDEX_TTL = getattr(settings, 'TAG_INDEX_TTL', 300)
+
+
+def trigrams(name):
+    return {name[i:i + GRAM] for i in range(len(name) - GRAM + 1)}
+
+
+class TagIndex:
+    """
+    In-memory lookup of tag ids by name prefix or substring.
+
+    Lowercased names are kept sorted, so a prefix is a bisect range, and
+    every trigram of a name points back at its tag, so a substring is the
+    intersection of the postings of its trigrams, verified against the names.
+    Other processes create tags too: the index is rebuilt whenever the shared
+    'tags' cache version moves past the one it was built at, or INDEX_TTL
+    seconds after the last build for caches that are not shared (LocMemCache),
+    where their bumps never arrive.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = None
+        self.built_at = None
+
+    def build(self):
+        version = cache.get_version('tags')
+        with self.lock:
+            self.names = {}
+            self.sorted = []
+            self.grams = {}
+            for tag_id, name in Tag.objects.values_list('id', 'name'):
+                self._add(tag_id, name)
+            self.sorted.sort()
+            self.version = version
+            self.built_at = time.monotonic()
+
+    def ensure_built(self):
+        if (self.version != cache.get_version('tags')
+                or time.monotonic() - self.built_at > INDEX_TTL):
+            self.build()
+
+    def _add(self, tag_id, name):
+        name = name.lower()
+        self.names[tag_id] = name
+        self.sorted.append((name, tag_id))
+        for gram in trigrams(name):
+            self.grams.setdefault(gram, set()).add(tag_id)
+
+    def _remove(self, tag_id):
+        name = self.names.pop(tag_id, None)
+        if name is None:
+            return
+        position = bisect.bisect_left(self.sorted, (name, tag_id))
+        if position < len(self.sorted) and self.sorted[position] == (name, tag_id):
+            del self.sorted[position]
+        for gram in trigrams(name):
+            self.grams.get(gram, set()).discard(tag_id)
+
+    def update_tag(self, tag_id, name):
+        # The caller bumps the version, so only this process skips the rebuild
+        with self.lock:
+            if self.version is None:
+                return
+            self._remove(tag_id)
+            self._add(tag_id, name)
+            self.sorted.sort()
+            self.version = cache.get_version('tags')
+
+    def remove_tag(self, tag_id):
+        with self.lock:
+            if self.version is None:
+                return
+            self._remove(tag_id)
+            self.version = cache.get_version('tags')
+
+    def prefix(self, query, limit=None):
+        """Ids of tags whose name starts with `query`, in name order."""
+        self.ensure_built()
+        query = query.lower()
+        with self.lock:
+            position = bisect.bisect_left(self.sorted, (query,))
+            ids = []
+            while position < len(self.sorted) and len(ids) != limit:
+                name, tag_id = self.sorted[position]
+                if not name.startswith(query):
+                    break
+                ids.append(tag_id)
+                position += 1
+        return ids
+
+    def contains(self, query):
+        """Ids of tags whose name contains `query`."""
+        self.ensure_built()
+        query = query.lower()
+        with self.lock:
+            if len(query) < GRAM:
+                return {tag_id for name, tag_id in self.sorted if query in name}
+            postings = sorted((self.grams.get(gram, set()) for gram in trigrams(query)), key=len)
+            candidates = set.intersection(*postings)
+            return {tag_id for tag_id in candidates if query in self.names[tag_id]}
+
+    def complete(self, query, limit):
+        """Prefix matches in name order, then other substring matches."""
+        ids = self.prefix(query, limit)
+        if len(ids) < limit:
+            seen = set(ids)
+            with self.lock:
+                rest = sorted((self.names[tag_id], tag_id) for tag_id in self.contains(query) - seen)
+            ids.extend(tag_id for _, tag_id in rest[:limit - len(ids)])
+        return ids
+
+
+index = TagIndex()
+
+
+class TagCatalog:
+    """
+    Every tag with the number of posts using it, pre-serialized and sorted
+    both by popularity and by name. Rebuilt when the 'tags' cache version
+    moves (tags created or removed anywhere) or, since tagging posts does not
+    bump it, once usage counts are CATALOG_TTL seconds old.
+    """
+    orderings = {
+        'popular': lambda tag: (-tag['usage_count'], tag['name'], tag['id']),
+        'name': lambda tag: (tag['name'], tag['id']),
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.built_at = None
+
+    def build(self):
+        version = cache.get_version('tags')
+        usage = dict(
+            TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Post))
+            .order_by().values('tag_id').annotate(total=Count('id')).values_list('tag_id', 'total')
+        )
+        tags = [
+            {'id': tag_id, 'name': name, 'slug': slug, 'usage_count': usage.get(tag_id, 0)}
+            for tag_id, name, slug in Tag.objects.values_list('id', 'name', 'slug')
+        ]
+        sorted_tags = {}
+        for ordering, key in self.orderings.items():
+            tags.sort(key=key)
+            sorted_tags[ordering] = (list(tags), [key(tag) for tag in tags])
+        with self.lock:
+            self.sorted = sorted_tags
+            self.version = version
+            self.built_at = time.monotonic()
+
+    def get(self, ordering):
+        """(tags, sort keys) in the given ordering."""
+        if (self.version != cache.get_version('tags')
+                or time.monotonic() - self.built_at > CATALOG_TTL):
+            self.build()
+        return self.sorted[ordering]
+
+
+catalog = TagCatalog()
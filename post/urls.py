@@ -3,7 +3,10 @@ from .views import ( PostListView, CreatePostView, DeletePostView, UpdatePostVie
                     CreateCommentView, DeleteCommentView, FollowView, NetworkListView, FollowListView, 
                     PostDetailView, NotificationsView, NotificationsSeenView, ProfileView, ReportPostView, 
                     PostBlockedListView, PostReportedListView, ContactListView, PostSearchView, ListTagsAPIView,
-                    CreateInterestAPIView, UserPostListView, UpdateInterestAPIView, RePostView, UnBlockPostView )
+                    CreateInterestAPIView, UserPostListView, UpdateInterestAPIView, RePostView, UnBlockPostView,
+                    TagAutocompleteView, PostTextSearchView,
+                    BulkBlockPostView, BulkUnBlockPostView,
+                    UnreadNotificationsView, NotificationsBatchSeenView )
 
 app_name = 'post'
 
@@ -11,7 +14,9 @@ urlpatterns = [
     path('', PostListView.as_view(), name='posts'),
     path('user-posts/', UserPostListView.as_view(), name='user-posts'),
     path('search/', PostSearchView.as_view(), name='post-search'),
+    path('search/text/', PostTextSearchView.as_view(), name='post-text-search'),
     path('tags/', ListTagsAPIView.as_view(), name='list-tags'),
+    path('tags/autocomplete/', TagAutocompleteView.as_view(), name='tags-autocomplete'),
     path('interests/', CreateInterestAPIView.as_view(), name='interests'),
     path('update-interests/', UpdateInterestAPIView.as_view(), name='update-interests'),
     path('view/<int:pk>/', PostDetailView.as_view(), name='view-post'),
@@ -23,12 +28,16 @@ urlpatterns = [
     path('contacts/', ContactListView.as_view(), name='contacts'),
     path('notifications/', NotificationsView.as_view(), name='notifications'),
     path('notifications-seen/<int:pk>/', NotificationsSeenView.as_view(), name='notifications-seen'),
+    path('notifications-seen/', NotificationsBatchSeenView.as_view(), name='notifications-batch-seen'),
+    path('notifications/unread/', UnreadNotificationsView.as_view(), name='notifications-unread'),
     path('profile/<str:email>/', ProfileView.as_view(), name='profile'),
     path('update-post/<int:pk>/', UpdatePostView.as_view(), name='update-post'),
     path('delete-post/<int:pk>/', DeletePostView.as_view(), name='delete-post'),
     path('re-post/<int:pk>/', RePostView.as_view(), name='re-post'),
     path('block-post/<int:pk>/', BlockPostView.as_view(), name='block-post'),
     path('unblock-post/<int:pk>/', UnBlockPostView.as_view(), name='unblock-post'),
+    path('block-posts/', BulkBlockPostView.as_view(), name='block-posts'),
+    path('unblock-posts/', BulkUnBlockPostView.as_view(), name='unblock-posts'),
     path('like/<int:pk>/', LikeView.as_view(), name='like-post'),
     path('report/<int:pk>/', ReportPostView.as_view(), name='report-post'),
     path('follow/<int:pk>/', FollowView.as_view(), name='follow'),
@@ -0,0 +1,53 @@
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Post, Follow
+from . import likes
+
+# Likers shown with each post in lists, most recent first.
+PREVIEW_SIZE = 3
+
+Like = Post.likes.through
+Report = Post.reported_by_users.through
+
+
+class ViewerState:
+    """
+    What the requesting user's relation to each post of a page is: liked,
+    reported, following the author, plus the latest likers of each post.
+    One query per relation for the whole page.
+    """
+
+    def __init__(self, user, posts):
+        post_ids = [post.id for post in posts]
+        author_ids = {post.author_id for post in posts}
+        self.liked = self.reported = self.followed = frozenset()
+        if user is not None and user.is_authenticated and post_ids:
+            stored = Like.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True)
+            self.liked = likes.buffer.merge_liked(user.id, post_ids, stored)
+            self.reported = set(
+                Report.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True)
+            )
+            self.followed = set(
+                Follow.objects.filter(follower=user, following_id__in=author_ids).values_list('following_id', flat=True)
+            )
+
+        self.likers = {}
+        if post_ids:
+            latest = Like.objects.filter(post_id__in=post_ids).annotate(
+                position=Window(RowNumber(), partition_by=F('post_id'), order_by=F('id').desc()),
+            ).filter(position__lte=PREVIEW_SIZE).select_related('user').order_by('post_id', 'position')
+            for like in latest:
+                self.likers.setdefault(like.post_id, []).append(like.user)
+
+    def has_liked(self, post):
+        return post.id in self.liked
+
+    def has_reported(self, post):
+        return post.id in self.reported
+
+    def follows_author(self, post):
+        return post.author_id in self.followed
+
+    def liked_by(self, post):
+        return self.likers.get(post.id, [])
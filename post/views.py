@@ -2,74 +2,167 @@ from rest_framework.views import APIView
 from rest_framework import permissions, status, generics
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
-from django.db.models import Q, Count
+from django.db.models import Q, F, Max, Count, Sum
 from django.db import transaction
+from django.utils import timezone
 
 from .serializers import ( PostSerializer, CommentSerializer, UserSerializer, NotificationSerializer, 
-                          TagsSerializer, InterestSerializer )
+                          TagsSerializer, InterestSerializer, IdListSerializer, NotificationSeenSerializer,
+                          UserNotifySerializer, LikeSerializer,
+                          query_list )
 from .models import Post, Comment, Follow, Notification, Interest
-from taggit.models import Tag
+from django.contrib.contenttypes.models import ContentType
+from taggit.models import Tag, TaggedItem
 from users.models import User
+from . import cache, fanout, feed, likes, moderation, notifications, search
+from .pagination import KeysetPagination, RankedPagination, SincePagination, SortedListPagination
+from .queries import post_queryset, user_queryset
+from .conditional import conditional
+from .tag_index import index as tag_index, catalog as tag_catalog
 
 # Create your views here.
 
+def post_validators(request, pk):
+    rows = Post.objects.filter(pk=pk).values(
+        'updated_at', 'likes_count', 'comments_count', 'reports_count', 'is_deleted', 'is_blocked',
+        'author__first_name', 'author__last_name', 'author__profile_image',
+        'author__follower_count', 'author__following_count', 'author__posts_count',
+    ).annotate(last_comment=Max('comments__id'))
+    if not rows:
+        return None
+    # Unflushed likes change the body without touching the row
+    return tuple(rows[0].values()) + (likes.buffer.delta(pk),)
+
+
+def profile_validators(request, email):
+    profile = User.objects.filter(email=email).values(
+        'id', 'first_name', 'last_name', 'age', 'gender', 'profile_image', 'is_online', 'is_active',
+        'country', 'education', 'work', 'follower_count', 'following_count', 'posts_count',
+    ).first()
+    if profile is None:
+        return None
+    posts = Post.objects.filter(author_id=profile['id'], is_deleted=False, is_blocked=False).aggregate(
+        total=Count('id'), last_updated=Max('updated_at'),
+        likes=Sum('likes_count'), comments=Sum('comments_count'),
+    )
+    return tuple(profile.values()), tuple(posts.values())
+
+
 class PostListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = PostSerializer
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         user = self.request.user
-        queryset = Post.objects.filter(Q(is_deleted=False) & Q(is_blocked=False))
-        user_tags = Interest.objects.get(user=user).interests.all()
-        queryset = queryset.annotate(
-            shared_tags=Count(
-                'tags',
-                filter=Q(tags__in=user_tags)
-            )
-        )
-        queryset = queryset.order_by('-shared_tags', '-created_at')
-        return queryset
+        return [post_queryset(feed.ranked_posts(user)), post_queryset(feed.recent_posts(user))]
+
+    def list(self, request, *args, **kwargs):
+        key = cache.feed_cache_key(request.user.id, request.get_full_path())
+        data = cache.get_feed(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        cache.set_feed(key, response.data)
+        return response
 
 
 class UserPostListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = PostSerializer
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         user = self.request.user
-        queryset = Post.objects.filter(author=user)
-        return queryset
+        queryset = Post.objects.filter(author=user).order_by('-created_at', '-id')
+        return post_queryset(queryset)
 
 
 class PostSearchView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        tag_name = request.query_params.get('tags')
-        if not tag_name:
+        terms = query_list(request, 'tags')
+        if not terms:
             return Response({"error": "Please provide at least one tag."}, status=status.HTTP_400_BAD_REQUEST)
-        queryset = Post.objects.filter(tags__name__icontains=tag_name, is_deleted=False, is_blocked=False)
-        serializer = PostSerializer(queryset, many=True)
+        # ?match=prefix narrows each term to tags starting with it
+        if request.query_params.get('match') == 'prefix':
+            tag_ids = {tag_id for term in terms for tag_id in tag_index.prefix(term)}
+        else:
+            tag_ids = set().union(*(tag_index.contains(term) for term in terms))
+        tagged = TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Post), tag_id__in=tag_ids
+        ).values('object_id')
+        # A subquery rather than a join, so posts with several matching tags come back once
+        queryset = Post.objects.filter(id__in=tagged, is_deleted=False, is_blocked=False)
+        queryset = post_queryset(queryset.order_by('-created_at', '-id'))
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = PostSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+
+class PostTextSearchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "Please provide a search query."}, status=status.HTTP_400_BAD_REQUEST)
+        paginator = RankedPagination()
+        hits = paginator.paginate_search(lambda after, limit: search.search_posts(query, after, limit), request)
+        visible = Post.objects.filter(is_deleted=False, is_blocked=False)
+        posts = post_queryset(visible).in_bulk([post_id for _, post_id in hits])
+        page = [posts[post_id] for _, post_id in hits if post_id in posts]
+        serializer = PostSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+
+class TagAutocompleteView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "Please provide a query."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+        tag_ids = tag_index.complete(query, max(limit, 1))
+        tags = Tag.objects.in_bulk(tag_ids)
+        serializer = TagsSerializer([tags[tag_id] for tag_id in tag_ids if tag_id in tags], many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class PostBlockedListView(generics.ListAPIView):
     permission_classes = [permissions.IsAdminUser]
-    queryset = Post.objects.filter(is_blocked=True).order_by('-created_at')
+    queryset = post_queryset(Post.objects.filter(is_blocked=True).order_by('-created_at'))
     serializer_class = PostSerializer
 
 
 class PostReportedListView(generics.ListAPIView):
+    # Moderation queue: most reported first, then most recently reported
     permission_classes = [permissions.IsAdminUser]
-    queryset = Post.objects.filter(is_blocked=False, reported_by_users__isnull=False).order_by('-created_at')
+    queryset = post_queryset(
+        Post.objects.filter(pending_reports__gt=0, is_blocked=False)
+        .order_by('-pending_reports', '-last_reported_at', '-id')
+    )
     serializer_class = PostSerializer
+    pagination_class = KeysetPagination
 
 
 class PostDetailView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
-    queryset = Post.objects.all()
+    queryset = post_queryset()
     serializer_class = PostSerializer
 
+    @conditional(post_validators)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 class CreatePostView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -84,15 +177,12 @@ class CreatePostView(APIView):
             tags = request.data.getlist('tags')
             serializer = self.serializer_class(data=request.data)
             if serializer.is_valid():
-                post = serializer.save(author=user, post_img=post_img, content=content, tags=tags)
-                for follower in user.followers.all():
-                    Notification.objects.create(
-                        from_user=user,
-                        to_user=follower.follower,
-                        post=post,
-                        notification_type=Notification.NOTIFICATION_TYPES[1][0],
-                    )
-                
+                with transaction.atomic():
+                    post = serializer.save(author=user, post_img=post_img, content=content, tags=tags)
+                    User.objects.filter(pk=user.pk).update(posts_count=F('posts_count') + 1)
+                    # Followers are notified in the background once the post is committed
+                    fanout.fan_out(post)
+
                 # Serialize the created post instance
                 serialized_post = self.serializer_class(instance=post)
             
@@ -108,9 +198,12 @@ class DeletePostView(APIView):
 
     def delete(self, request, pk):
         try:
-            post = Post.objects.get(pk=pk)
-            post.is_deleted = True
-            post.save()
+            with transaction.atomic():
+                post = Post.objects.select_for_update().get(pk=pk)
+                if not post.is_deleted:
+                    post.is_deleted = True
+                    post.save()
+                    User.objects.filter(pk=post.author_id).update(posts_count=F('posts_count') - 1)
             return Response(status=status.HTTP_200_OK)
         except Post.DoesNotExist:
             return Response("Not found in database", status=status.HTTP_404_NOT_FOUND)
@@ -121,9 +214,12 @@ class RePostView(APIView):
 
     def delete(self, request, pk):
         try:
-            post = Post.objects.get(pk=pk)
-            post.is_deleted = False
-            post.save()
+            with transaction.atomic():
+                post = Post.objects.select_for_update().get(pk=pk)
+                if post.is_deleted:
+                    post.is_deleted = False
+                    post.save()
+                    User.objects.filter(pk=post.author_id).update(posts_count=F('posts_count') + 1)
             return Response(status=status.HTTP_200_OK)
         except Post.DoesNotExist:
             return Response("Not found in database", status=status.HTTP_404_NOT_FOUND)
@@ -137,7 +233,9 @@ class BlockPostView(APIView):
             user = request.user
             post = Post.objects.get(pk=pk)
             post.is_blocked = True
-            post.save()
+            # Blocking settles the reports so far and takes the post off the queue
+            post.pending_reports = 0
+            post.save(update_fields=['is_blocked', 'pending_reports', 'updated_at'])
             Notification.objects.create(
                         from_user=user,
                         to_user=post.author,
@@ -157,12 +255,33 @@ class UnBlockPostView(APIView):
             user = request.user
             post = Post.objects.get(pk=pk)
             post.is_blocked = False
-            post.save()
+            post.pending_reports = 0
+            post.save(update_fields=['is_blocked', 'pending_reports', 'updated_at'])
             return Response("Post unblocked successfully", status=status.HTTP_200_OK)
         except Post.DoesNotExist:
             return Response("Not found in database", status=status.HTTP_404_NOT_FOUND)
         
 
+class BulkBlockPostView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        serializer = IdListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        blocked = moderation.block_posts(serializer.validated_data['ids'], request.user)
+        return Response({"blocked": blocked}, status=status.HTTP_200_OK)
+
+
+class BulkUnBlockPostView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        serializer = IdListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        unblocked = moderation.unblock_posts(serializer.validated_data['ids'])
+        return Response({"unblocked": unblocked}, status=status.HTTP_200_OK)
+
+
 class UpdatePostView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = PostSerializer
@@ -184,27 +303,20 @@ class LikeView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
-        try:
-            post = Post.objects.get(pk=pk)
-            user = request.user
-            if user in post.likes.all():
-                post.likes.remove(user)
-                return Response("Like removed", status=status.HTTP_200_OK)
-            else:
-                post.likes.add(user)
-                if not post.author == user:
-                    Notification.objects.create(
-                        from_user=user,
-                        to_user=post.author,
-                        post=post,
-                        notification_type=Notification.NOTIFICATION_TYPES[0][0],
-                    )                   
-                return Response("Like added", status=status.HTTP_200_OK)
-        except Post.DoesNotExist:
+        if not Post.objects.filter(pk=pk).exists():
             return Response("Post not found", status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
-            return Response(str(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
+        # The state asked for, not a toggle: workers buffering the same pair cannot flip it twice
+        serializer = LikeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        liked = serializer.validated_data['liked']
+        # Written in batches by the like buffer, which also sends the notification
+        likes.buffer.set_liked(pk, request.user.id, liked)
+        # Only the liker must see it at once; other feeds pick up the count as their cache expires
+        cache.invalidate_user_feed(request.user.id)
+        if liked:
+            return Response("Like added", status=status.HTTP_200_OK)
+        return Response("Like removed", status=status.HTTP_200_OK)
+
 
 class ReportPostView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -214,10 +326,19 @@ class ReportPostView(APIView):
             post = Post.objects.get(pk=pk)
             user = request.user
 
-            if user in post.reported_by_users.all():
-                return Response("You have already reported this post.", status=status.HTTP_400_BAD_REQUEST)
+            with transaction.atomic():
+                _, created = Post.reported_by_users.through.objects.get_or_create(post=post, user=user)
+                if created:
+                    Post.objects.filter(pk=post.pk).update(
+                        reports_count=F('reports_count') + 1,
+                        pending_reports=F('pending_reports') + 1,
+                        last_reported_at=timezone.now(),
+                    )
+                    User.objects.filter(pk=user.pk).update(reported_posts_count=F('reported_posts_count') + 1)
+                    cache.invalidate_user_feed(user.pk)
 
-            post.reported_by_users.add(user)                  
+            if not created:
+                return Response("You have already reported this post.", status=status.HTTP_400_BAD_REQUEST)
             return Response("Post Reported", status=status.HTTP_200_OK)
                 
         except Post.DoesNotExist:
@@ -239,7 +360,9 @@ class FollowView(APIView):
             if follow_instance:
                 # Unfollow logic
                 with transaction.atomic():
-                    follow_instance.delete()
+                    removed, _ = Follow.objects.filter(following=following, follower=follower).delete()
+                    User.objects.filter(pk=following.pk).update(follower_count=F('follower_count') - removed)
+                    User.objects.filter(pk=follower.pk).update(following_count=F('following_count') - removed)
                     # Check if the chat room exists and delete it
                 return Response("Unfollowed", status=status.HTTP_200_OK)
             else:
@@ -247,11 +370,9 @@ class FollowView(APIView):
                 with transaction.atomic():
                     follow = Follow(following=following, follower=follower)
                     follow.save()
-                    Notification.objects.create(
-                        from_user=follower,
-                        to_user=following,
-                        notification_type=Notification.NOTIFICATION_TYPES[2][0],
-                    ) 
+                    User.objects.filter(pk=following.pk).update(follower_count=F('follower_count') + 1)
+                    User.objects.filter(pk=follower.pk).update(following_count=F('following_count') + 1)
+                    notifications.notify([follower.id], following.id, Notification.NOTIFICATION_TYPES[2][0])
                 return Response("Followed", status=status.HTTP_200_OK)
 
         except User.DoesNotExist:
@@ -267,7 +388,7 @@ class NetworkListView(generics.ListAPIView):
     def get_queryset(self):
         current_user = self.request.user
         queryset = User.objects.exclude(Q(id=current_user.id) | Q(followers__follower=current_user))
-        return queryset
+        return user_queryset(queryset)
     
 
 class FollowListView(generics.ListAPIView):
@@ -277,7 +398,7 @@ class FollowListView(generics.ListAPIView):
     def get_queryset(self):
         current_user = self.request.user
         queryset = User.objects.filter(Q(followers__follower=current_user) & ~Q(id=current_user.id))
-        return queryset
+        return user_queryset(queryset)
 
 
 class ContactListView(generics.ListAPIView):
@@ -289,7 +410,7 @@ class ContactListView(generics.ListAPIView):
         following_query = Q(followers__follower=current_user)
         followers_query = Q(following__following=current_user)
         queryset = User.objects.filter(following_query | followers_query).exclude(id=current_user.id).distinct()
-        return queryset
+        return user_queryset(queryset)
 
 
 class CreateCommentView(APIView):
@@ -303,7 +424,9 @@ class CreateCommentView(APIView):
             print(request.data, body)
             serializer = self.serializer_class(data=request.data)
             if serializer.is_valid():
-                serializer.save(user=user, post_id=pk, body=body)
+                with transaction.atomic():
+                    serializer.save(user=user, post_id=pk, body=body)
+                    Post.objects.filter(pk=pk).update(comments_count=F('comments_count') + 1)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             else:
                 print(serializer.errors)
@@ -318,27 +441,29 @@ class DeleteCommentView(APIView):
     def delete(self, request, pk):
         try:
             comment = Comment.objects.get(pk=pk, user=request.user)
-            comment.delete()                        
+            with transaction.atomic():
+                comment.delete()
+                Post.objects.filter(pk=comment.post_id).update(comments_count=F('comments_count') - 1)
             return Response(status=status.HTTP_200_OK)
         except Comment.DoesNotExist:
             return Response("Not found in database", status=status.HTTP_404_NOT_FOUND)
 
 
 class NotificationsView(generics.ListAPIView):
+    # Unseen notifications, newest first; poll with ?since= for only what changed
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = NotificationSerializer
+    pagination_class = SincePagination
 
     def get_queryset(self):
         user = self.request.user
-        return Notification.objects.filter(to_user=user).exclude(is_seen=True).order_by('-created')
-
-    def get(self, request, *args, **kwargs):
-        try:
-            queryset = self.get_queryset()
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response(str(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return (
+            Notification.objects.filter(to_user=user, is_seen=False)
+            .select_related('from_user').order_by('-updated', '-id')
+            # Only what NotificationSerializer shows of the actor
+            .defer(*(f'from_user__{field.attname}' for field in User._meta.concrete_fields
+                     if field.name not in UserNotifySerializer.Meta.fields))
+        )
 
 
 class NotificationsSeenView(generics.ListAPIView):
@@ -346,28 +471,56 @@ class NotificationsSeenView(generics.ListAPIView):
     serializer_class = NotificationSerializer
 
     def post(self, request, pk, *args, **kwargs):
-        try:
-            notification = Notification.objects.get(pk=pk)
-            notification.is_seen = True
-            notification.save()
-            return Response(status=status.HTTP_200_OK)
-        except Post.DoesNotExist:
+        notification = Notification.objects.filter(pk=pk, to_user=request.user)
+        if not notification.exists():
             return Response("Not found in database", status=status.HTTP_404_NOT_FOUND)
+        notifications.mark_seen(request.user.id, notification)
+        return Response(status=status.HTTP_200_OK)
+
+
+class NotificationsBatchSeenView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = NotificationSeenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        selected = Notification.objects.filter(serializer.selection())
+        # One UPDATE, no post_save per row; the unread counter drops by the rows flipped
+        seen = notifications.mark_seen(request.user.id, selected)
+        unread = User.objects.filter(pk=request.user.id).values_list('unread_notifications', flat=True).first()
+        return Response({"seen": seen, "unread": unread}, status=status.HTTP_200_OK)
+
+
+class UnreadNotificationsView(APIView):
+    # Badge count straight off the user row the authentication already loaded
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({"unread": request.user.unread_notifications}, status=status.HTTP_200_OK)
 
 
 class ProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @conditional(profile_validators)
+    def get(self, request, email, *args, **kwargs):
+        return self.post(request, email, *args, **kwargs)
+
     def post(self, request, email, *args, **kwargs):
         try:
-            profile = User.objects.get(email=email)
-            profile_posts = Post.objects.filter(author=profile, is_deleted=False, is_blocked=False).order_by('-updated_at')
-            profile_serializer = UserSerializer(profile)
-            post_serializer = PostSerializer(profile_posts, many=True)
+            profile = user_queryset().get(email=email)
+            profile_posts = post_queryset(
+                Post.objects.filter(author=profile, is_deleted=False, is_blocked=False).order_by('-created_at', '-id')
+            )
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(profile_posts, request, view=self)
+            profile_serializer = UserSerializer(profile, context={'request': request})
+            post_serializer = PostSerializer(page, many=True, context={'request': request})
 
             context = {
                 'profile_user': profile_serializer.data,
-                'profile_posts': post_serializer.data
+                'profile_posts': post_serializer.data,
+                'next': paginator.next_cursor,
             }
             return Response(context, status=status.HTTP_200_OK)
 
@@ -387,16 +540,18 @@ class CreateInterestAPIView(APIView):
             return Response({"message": "Please provide interests data"}, status=status.HTTP_400_BAD_REQUEST)
         interest_instance, created = Interest.objects.get_or_create(user=user)
 
+        # Collect the tags first so the feed is rebuilt once, not once per tag.
+        tags = []
         for interest in interests_data:
             try:
-                interest = Tag.objects.get(name=interest)
-                interest_instance.interests.add(interest)
+                tags.append(Tag.objects.get(name=interest))
             except Tag.DoesNotExist:
                 # Handle the case where the Tag with the provided ID does not exist.
                 return Response({"message": f"Tag with ID {interest} does not exist"}, status=status.HTTP_400_BAD_REQUEST)
             except ValueError:
                 # Handle the case where interests_data contains invalid data.
                 return Response({"message": "Invalid interest data"}, status=status.HTTP_400_BAD_REQUEST)
+        interest_instance.interests.add(*tags)
 
         user.set_interest = True
         user.save()
@@ -416,13 +571,10 @@ class UpdateInterestAPIView(APIView):
 
         interest_instance, created = Interest.objects.get_or_create(user=user)
 
-        # Clear existing interests
-        interest_instance.interests.clear()
-
+        tags = []
         for interest_name in interests_data:
             try:
-                interest = Tag.objects.get(name=interest_name)
-                interest_instance.interests.add(interest)
+                tags.append(Tag.objects.get(name=interest_name))
             except Tag.DoesNotExist:
                 # Handle the case where the Tag with the provided name does not exist.
                 return Response({"message": f"Tag with name '{interest_name}' does not exist"}, status=status.HTTP_400_BAD_REQUEST)
@@ -430,6 +582,9 @@ class UpdateInterestAPIView(APIView):
                 # Handle the case where interests_data contains invalid data.
                 return Response({"message": "Invalid interest data"}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Replace existing interests in one step
+        interest_instance.interests.set(tags)
+
         user.set_interest = True
         user.save()
         return Response({"message": "Interests updated successfully"}, status=status.HTTP_200_OK)
@@ -437,12 +592,19 @@ class UpdateInterestAPIView(APIView):
 
 class ListTagsAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
-    
+
     def get(self, request, *args, **kwargs):
         user = request.user
-        interest = Interest.objects.filter(user=user)
+        interest = Interest.objects.filter(user=user).prefetch_related('interests')
         serialized_interests = InterestSerializer(interest, many=True).data
-        tags = Tag.objects.all().distinct()
-        serialized_tags = TagsSerializer(tags, many=True).data
 
-        return Response({"tags": serialized_tags, "interests": serialized_interests}, status=status.HTTP_200_OK)
\ No newline at end of file
+        # ?ordering=popular (default) or name
+        ordering = request.query_params.get('ordering', 'popular')
+        if ordering not in tag_catalog.orderings:
+            return Response({"error": f"Unknown ordering '{ordering}'."}, status=status.HTTP_400_BAD_REQUEST)
+        tags, keys = tag_catalog.get(ordering)
+        paginator = SortedListPagination()
+        page = paginator.paginate_sorted(tags, keys, request)
+
+        return Response({"tags": page, "interests": serialized_interests, "next": paginator.next_cursor},
+                        status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,71 @@
+import logging
+import queue
+import threading
+
+from django.db import close_old_connections, transaction
+
+# Seconds the worker waits for a task before running its idle jobs.
+IDLE_INTERVAL = 60
+
+logger = logging.getLogger(__name__)
+
+
+class Worker(threading.Thread):
+    """
+    One long-lived thread per process that runs work handed over by requests,
+    in the order it was submitted. Idle jobs (resuming interrupted fan-outs)
+    run whenever the queue stays empty for IDLE_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self.tasks = queue.Queue()
+        self.idle_jobs = []
+        self.lock = threading.Lock()
+        self.started = False
+        threading.Thread.__init__(self, daemon=True)
+
+    def submit(self, task, *args):
+        self.tasks.put((task, args))
+        if not self.started:
+            with self.lock:
+                if not self.started:
+                    self.started = True
+                    self.start()
+
+    def on_idle(self, job):
+        self.idle_jobs.append(job)
+        return job
+
+    def run(self):
+        while True:
+            try:
+                task, args = self.tasks.get(timeout=IDLE_INTERVAL)
+            except queue.Empty:
+                for job in self.idle_jobs:
+                    self.execute(job, ())
+                continue
+            try:
+                self.execute(task, args)
+            finally:
+                self.tasks.task_done()
+
+    def execute(self, task, args):
+        try:
+            task(*args)
+        except Exception:
+            logger.exception("Background task %s failed", getattr(task, '__name__', task))
+        finally:
+            close_old_connections()
+
+    def wait(self):
+        """Block until every submitted task has run."""
+        if self.started:
+            self.tasks.join()
+
+
+worker = Worker()
+
+
+def defer(task, *args):
+    """Run `task(*args)` on the worker once the current transaction commits."""
+    transaction.on_commit(lambda: worker.submit(task, *args))
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.3 on 2026-10-17 12:54
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_unread(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Notification = apps.get_model('post', 'Notification')
+    unread = (
+        Notification.objects.filter(to_user=OuterRef('pk'), is_seen=False)
+        .order_by()
+        .values('to_user')
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    User.objects.update(unread_notifications=Coalesce(Subquery(unread), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_counters'),
+        ('post', '0016_moderation_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='unread_notifications',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_unread, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.3 on 2026-10-17 13:08
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def split_verified(apps, schema_editor):
+    # is_online used to mean "verified its email"; from now on it is presence
+    User = apps.get_model('users', 'User')
+    User.objects.update(is_verified=F('is_online'), is_online=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_unread_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='is_verified',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(split_verified, migrations.RunPython.noop),
+    ]
@@ -20,23 +20,40 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=False)
     profile_image = models.ImageField(blank=True, null=True, upload_to=upload_to, default='user.png')
     age = models.IntegerField(validators=[MinValueValidator(18), MaxValueValidator(99)])
+    # Kept current by users.presence from open WebSockets
     is_online = models.BooleanField(default=False)
+    is_verified = models.BooleanField(default=False)
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES, blank=True, null=True)
     country = models.CharField(max_length=50, blank=True, null=True)
     education = models.CharField(max_length=100, blank=True, null=True)
     work = models.CharField(max_length=100, blank=True, null=True)
     set_interest = models.BooleanField(default=False)
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    posts_count = models.PositiveIntegerField(default=0)
+    reported_posts_count = models.PositiveIntegerField(default=0)
+    unread_notifications = models.PositiveIntegerField(default=0)
 
     objects = UserAccountManager()
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name", "age"]
 
+    COUNTER_FIELDS = ('follower_count', 'following_count', 'posts_count', 'reported_posts_count',
+                      'unread_notifications')
+
     def __str__(self):
         return self.first_name
+
+    def save(self, *args, **kwargs):
+        # Counters only change through F() updates; never write back a stale copy
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in self.COUNTER_FIELDS]
+        super().save(*args, **kwargs)
     
     def get_follower_count(self):
-        return self.followers.count()
+        return self.follower_count
 
     def get_following_count(self):
-        return self.following.count()
+        return self.following_count
@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import close_old_connections
+from django.db.models import Q
+
+from post.models import Follow
+from post.notifications import encode_frame, send_many
+from .models import User
+
+# Seconds a user stays online without a socket of a live process vouching for them.
+TIMEOUT = getattr(settings, 'PRESENCE_TIMEOUT', 90)
+# Seconds between writes of online/offline transitions to User.is_online.
+FLUSH_INTERVAL = getattr(settings, 'PRESENCE_FLUSH_INTERVAL', 5.0)
+
+logger = logging.getLogger(__name__)
+
+
+def presence_key(user_id):
+    return f'presence:{user_id}'
+
+
+def cache_is_shared():
+    return not isinstance(caches['default'], LocMemCache)
+
+
+class PresenceFlusher(threading.Thread):
+
+    def __init__(self, presence):
+        self.presence = presence
+        threading.Thread.__init__(self, daemon=True)
+
+    def run(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.presence.flush()
+            except Exception:
+                logger.exception("Flushing presence changes failed")
+            finally:
+                close_old_connections()
+
+
+class Presence:
+    """
+    Who has a WebSocket open, across processes.
+
+    The shared cache holds a connection count per online user, raised on
+    connect and lowered on disconnect, so the first socket of a user brings
+    them online and the last one takes them offline whichever process
+    served them. Heartbeats and every flush of a process with the user
+    connected keep the count alive; one left behind by a crashed process
+    expires after TIMEOUT seconds and the sweep takes that user offline.
+
+    Transitions only touch the cache and are collected here. Every
+    FLUSH_INTERVAL seconds they are written with one UPDATE per direction
+    and pushed to the user's followers and followees, so heartbeats never
+    write to the database.
+
+    With a per-process cache (LocMemCache) the counts only cover this
+    process's sockets: there is no sweep, which would take every user of
+    the other processes offline, and each flush asserts this process's
+    users online again in case another process took them offline.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = Counter()
+        self.changes = {}
+        self.swept_at = time.monotonic()
+        self.flusher = None
+
+    def connect(self, user_id):
+        key = presence_key(user_id)
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            count = 1 if cache.add(key, 1, timeout=TIMEOUT) else cache.incr(key)
+        cache.touch(key, TIMEOUT)
+        with self.lock:
+            self.local[user_id] += 1
+            if count == 1:
+                self.changes[user_id] = True
+        self.start()
+
+    def disconnect(self, user_id):
+        key = presence_key(user_id)
+        try:
+            count = cache.decr(key)
+        except ValueError:
+            # Expired meanwhile: nobody else vouches for the user either
+            count = 0
+        if count <= 0:
+            cache.delete(key)
+        with self.lock:
+            self.local[user_id] -= 1
+            if self.local[user_id] <= 0:
+                del self.local[user_id]
+            if count <= 0:
+                self.changes[user_id] = False
+
+    def heartbeat(self, user_id):
+        if not cache.touch(presence_key(user_id), TIMEOUT):
+            # Expired although the socket is alive (missed heartbeats): count it again
+            self.revive(user_id)
+
+    def revive(self, user_id):
+        if cache.add(presence_key(user_id), 1, timeout=TIMEOUT):
+            with self.lock:
+                self.changes[user_id] = True
+
+    def start(self):
+        if self.flusher is None:
+            with self.lock:
+                if self.flusher is None:
+                    self.flusher = PresenceFlusher(self)
+                    self.flusher.start()
+
+    def flush(self):
+        with self.lock:
+            connected = list(self.local)
+            changes, self.changes = self.changes, {}
+        # Our own sockets keep their users' counts from expiring
+        for user_id in connected:
+            if not cache.touch(presence_key(user_id), TIMEOUT):
+                self.revive(user_id)
+        if not cache_is_shared():
+            changes.update((user_id, True) for user_id in connected)
+        elif time.monotonic() - self.swept_at > TIMEOUT:
+            self.swept_at = time.monotonic()
+            changes.update(self.sweep())
+        self.write(changes)
+
+    def sweep(self):
+        # Online in the database, but no live count: its process went away
+        online = list(User.objects.filter(is_online=True).values_list('id', flat=True))
+        alive = cache.get_many([presence_key(user_id) for user_id in online])
+        return {user_id: False for user_id in online if presence_key(user_id) not in alive}
+
+    def write(self, changes):
+        if not changes:
+            return
+        went_online = [user_id for user_id, online in changes.items() if online]
+        went_offline = [user_id for user_id, online in changes.items() if not online]
+        # Only rows that actually flip are announced; a quick reconnect flips nothing
+        flipped = dict(
+            User.objects.filter(Q(pk__in=went_online, is_online=False) | Q(pk__in=went_offline, is_online=True))
+            .values_list('id', 'is_online')
+        )
+        if not flipped:
+            return
+        User.objects.filter(pk__in=[user_id for user_id, was in flipped.items() if not was]).update(is_online=True)
+        User.objects.filter(pk__in=[user_id for user_id, was in flipped.items() if was]).update(is_online=False)
+        announce({user_id: not was for user_id, was in flipped.items()})
+
+
+def announce(changes):
+    """Push {user id: online} to everyone following or followed by those users."""
+    frames = {
+        user_id: encode_frame({"type": "presence", "user": user_id, "online": online})
+        for user_id, online in changes.items()
+    }
+    contacts = Follow.objects.filter(Q(following__in=changes) | Q(follower__in=changes)).values_list(
+        'following_id', 'follower_id')
+    # A mutual follow is two rows but one contact
+    pairs = set()
+    for following_id, follower_id in contacts:
+        for user_id, contact_id in ((following_id, follower_id), (follower_id, following_id)):
+            if user_id in changes:
+                pairs.add((user_id, contact_id))
+    send_many([
+        (f"notify_{contact_id}", {"type": "send_frame", "frame": frames[user_id]})
+        for user_id, contact_id in pairs
+    ])
+
+
+presence = Presence()
@@ -48,17 +48,11 @@ class UserCreateSerializer(serializers.ModelSerializer):
 
 
 class UserSerializer(serializers.ModelSerializer):
-    follower_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
+    follower_count = serializers.IntegerField(read_only=True)
+    following_count = serializers.IntegerField(read_only=True)
     followers = serializers.SerializerMethodField()
     following = serializers.SerializerMethodField()
-    reported_posts_count = serializers.SerializerMethodField()
-
-    def get_follower_count(self, obj):
-        return obj.get_follower_count()
-
-    def get_following_count(self, obj):
-        return obj.get_following_count()
+    reported_posts_count = serializers.IntegerField(read_only=True)
 
     def get_followers(self, obj):
         followers = obj.followers.all()
@@ -70,9 +64,6 @@ class UserSerializer(serializers.ModelSerializer):
         following_serializer = FollowSerializer(following, many=True)
         return following_serializer.data
     
-    def get_reported_posts_count(self, obj):
-        return obj.reported_posts.count()
-    
     def validate_profile_image(self, value):
         max_size = 1.5 * 1024 * 1024  # 1.5 MB in bytes
 
@@ -95,18 +86,9 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class UserAdminSerializer(serializers.ModelSerializer):
-    follower_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
-    reported_posts_count = serializers.SerializerMethodField()
-
-    def get_follower_count(self, obj):
-        return obj.get_follower_count()
-
-    def get_following_count(self, obj):
-        return obj.get_following_count()
-    
-    def get_reported_posts_count(self, obj):
-        return obj.reported_posts.count()
+    follower_count = serializers.IntegerField(read_only=True)
+    following_count = serializers.IntegerField(read_only=True)
+    reported_posts_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -134,8 +116,8 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
             # Add custom claims
             return token
         else:
-            if user.is_online:
-                # User is not online, customize the response or raise an exception
+            if user.is_verified:
+                # Verified but inactive: blocked by an admin
                 raise InvalidToken("Your account has been blocked.")
             else:
                 raise InvalidToken("Please verify your email id.")
@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import ( RegisterView, RetrieveUserView, UpdateUserView, UserListView, UserBlockView, 
-                    ChangePasswordView, VerifyEmail, ForgotPasswordView, PasswordResetConfirmView )
+                    UserBulkBlockView, UserBulkUnBlockView, ChangePasswordView, VerifyEmail, ForgotPasswordView,
+                    PasswordResetConfirmView )
 
 urlpatterns = [
     path('register/', RegisterView.as_view()),
@@ -8,6 +9,8 @@ urlpatterns = [
     path('update/', UpdateUserView.as_view()),
     path('list/', UserListView.as_view()),
     path('block/<int:pk>/', UserBlockView.as_view()),
+    path('bulk-block/', UserBulkBlockView.as_view()),
+    path('bulk-unblock/', UserBulkUnBlockView.as_view()),
     path('change-password/', ChangePasswordView.as_view(), name='change-password'),
     path('email-verify/', VerifyEmail.as_view(), name="email-verify"),
     path('forgot-password/', ForgotPasswordView.as_view(), name='forgot_password'),
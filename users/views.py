@@ -21,6 +21,9 @@ from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from django.db import transaction
+from post.notifications import send_many
+from post.serializers import IdListSerializer
 
 # Create your views here.
 class InvalidToken(AuthenticationFailed):
@@ -119,6 +122,36 @@ class UserBlockView(APIView):
             return Response(str(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class UserBulkBlockView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        serializer = IdListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            blocked = list(User.objects.select_for_update().filter(
+                id__in=serializer.validated_data['ids'], is_active=True).values_list('id', flat=True))
+            User.objects.filter(id__in=blocked).update(is_active=False)
+            # Send logout events to the NotificationConsumer once the block is committed
+            transaction.on_commit(lambda: send_many([
+                ("notify_{}".format(user_id), {'type': 'logout_user'}) for user_id in blocked
+            ]))
+        return Response({"blocked": blocked}, status=status.HTTP_200_OK)
+
+
+class UserBulkUnBlockView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        serializer = IdListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            allowed = list(User.objects.select_for_update().filter(
+                id__in=serializer.validated_data['ids'], is_active=False).values_list('id', flat=True))
+            User.objects.filter(id__in=allowed).update(is_active=True)
+        return Response({"allowed": allowed}, status=status.HTTP_200_OK)
+
+
 class ChangePasswordView(generics.UpdateAPIView):
     serializer_class = ChangePasswordSerializer
     permission_classes = (permissions.IsAuthenticated,)
@@ -155,8 +188,8 @@ class VerifyEmail(generics.GenericAPIView ):
             payload = jwt.decode(token, options={"verify_signature": False})
             print(payload)
             user = User.objects.get(id=payload['user_id'])
-            if not user.is_online:
-                user.is_online = True
+            if not user.is_verified:
+                user.is_verified = True
                 user.is_active = True
                 user.save()
             return Response({'email': 'Successfully activated'}, status=status.HTTP_200_OK)